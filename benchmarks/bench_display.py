@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: display frame rendering and transfer.
+
+Drives WaveshareDisplay (LCD_1inch3) on a fake SPI bus and reports, per call,
+the PIL render time, the time to present the frame (RGB565 packing and SPI
+hand-off, only the changed regions where possible), and the bytes sent.
+
+    python benchmarks/bench_display.py [--frames N]
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from fakes import SERVER_DIR, install_fakes
+
+
+def measure(name, frames, render, present, spi):
+    render_ms = present_ms = 0.0
+    sent = 0
+    for i in range(frames):
+        start = time.perf_counter()
+        image = render(i)
+        rendered = time.perf_counter()
+        before = spi.bytes_written
+        present(image)
+        present_ms += (time.perf_counter() - rendered) * 1000
+        render_ms += (rendered - start) * 1000
+        sent += spi.bytes_written - before
+    print(f"{name:<22} {render_ms / frames:>10.2f} {present_ms / frames:>11.2f} {sent // frames:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Display frame benchmark")
+    parser.add_argument("--frames", type=int, default=50)
+    opts = parser.parse_args()
+
+    install_fakes()
+    # Background images are looked up relative to the server directory
+    os.chdir(SERVER_DIR)
+    from display.display import Display, show_welcome_screen
+    from display.waveshare_display import WaveshareDisplay
+
+    display = WaveshareDisplay()
+    spi = display.disp.SPI
+    last_sync = datetime.now() - timedelta(minutes=5)
+
+    def status(i):
+        # Battery and temperature change every frame, as they would across syncs
+        Display.show_status(
+            display, "GW-B5600", 50 + i % 50, 20 + i % 10, last_sync,
+            "07:30", "Dentist", "ON",
+        )
+        return display.image
+
+    def welcome(i):
+        # Render only: capture the frame instead of presenting it
+        captured = []
+        display.present = captured.append
+        try:
+            show_welcome_screen(display, f"Waiting for connection {i % 2}", "GW-B5600", last_sync)
+        finally:
+            del display.present
+        return captured[0]
+
+    print(f"{'frame':<22} {'render ms':>10} {'present ms':>11} {'bytes/frame':>12}")
+    measure("show_welcome_screen", opts.frames, welcome, display.present, spi)
+    measure("show_status", opts.frames, status, display.present, spi)
+
+    # The minute tick redraws only the "since sync" value on the status screen
+    start = time.perf_counter()
+    before = spi.bytes_written
+    for i in range(opts.frames):
+        display._last_sync = last_sync - timedelta(minutes=i)
+        display.tick_last_sync()
+    tick_ms = (time.perf_counter() - start) * 1000 / opts.frames
+    print(f"{'tick_last_sync':<22} {'':>10} {tick_ms:>11.2f} {(spi.bytes_written - before) // opts.frames:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Micro-benchmark: RGB565 packing and SPI hand-off in LCD_1inch3.ShowImage.
+
+Compares the original list-based frame path with the vectorized buffer path.
+Runs without display hardware: spidev and gpiozero are replaced by stand-ins
+that only count the bytes they are given.
+
+    python benchmarks/bench_rgb565.py [--frames N]
+"""
+
+import argparse
+import sys
+import time
+
+from fakes import FakeSpiDev, install_fakes
+
+
+def legacy_rgb565(np, image):
+    """The pre-vectorization packing from ShowImage, kept here as the baseline."""
+    img = np.asarray(image)
+    height, width = img.shape[:2]
+    pix = np.zeros((width, height, 2), dtype=np.uint8)
+    pix[..., [0]] = np.add(np.bitwise_and(img[..., [0]], 0xF8), np.right_shift(img[..., [1]], 5))
+    pix[..., [1]] = np.add(np.bitwise_and(np.left_shift(img[..., [1]], 3), 0xE0), np.right_shift(img[..., [2]], 3))
+    return pix.flatten().tolist()
+
+
+def legacy_show_image(disp, image):
+    pix = legacy_rgb565(disp.np, image)
+    disp.SetWindows(0, 0, disp.width, disp.height)
+    disp.digital_write(disp.DC_PIN, True)
+    for i in range(0, len(pix), 4096):
+        disp.spi_writebyte(pix[i:i + 4096])
+
+
+def time_frames(show, image, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        show(image)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RGB565 frame benchmark")
+    parser.add_argument("--frames", type=int, default=50)
+    opts = parser.parse_args()
+
+    install_fakes()
+    from PIL import Image
+    from display.lib.LCD_1inch3 import LCD_1inch3
+
+    disp = LCD_1inch3(spi=FakeSpiDev())
+    image = Image.effect_noise((disp.width, disp.height), 100).convert("RGB")
+
+    # Both paths must put the same bytes on the bus
+    if disp.to_rgb565(image).reshape(-1).tolist() != legacy_rgb565(disp.np, image):
+        sys.exit("vectorized RGB565 output differs from the legacy path")
+
+    legacy_ms = time_frames(lambda img: legacy_show_image(disp, img), image, opts.frames)
+    fast_ms = time_frames(disp.ShowImage, image, opts.frames)
+
+    print(f"legacy ShowImage:     {legacy_ms:8.2f} ms/frame")
+    print(f"vectorized ShowImage: {fast_ms:8.2f} ms/frame")
+    print(f"speedup:              {legacy_ms / fast_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
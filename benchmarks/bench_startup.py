@@ -0,0 +1,121 @@
+"""
+Cold start report for the server entry points.
+
+1. Import-time profile: runs `python -X importtime -c "import <entry>"` and
+   summarizes where the time goes, by top-level package and by module.
+2. Time to first scan: starts the entry point with the simulated BLE stack and
+   measures from process spawn to the first scan request, which is what a
+   `systemctl restart` waits for. Exits non-zero if it exceeds --budget-ms.
+
+    python benchmarks/bench_startup.py [--entry gshock_server_display] [--budget-ms 2000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from fakes import SERVER_DIR
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the child: the real entry point, with the BLE stack and the adapter check faked
+FIRST_SCAN_DRIVER = """
+import asyncio, os, sys, time
+sys.path[:0] = [{here!r}, {server!r}]
+spawned = float(os.environ["BENCH_SPAWNED_AT"])
+
+import {entry} as server
+import session_scheduler
+from check_bt import AdapterMonitor, AdapterState
+from fakes import FakeWatches, Latencies
+
+watches = FakeWatches(0, Latencies())
+watches.install(session_scheduler)
+
+class FirstScan(session_scheduler.BleakScanner):
+    async def find_device_by_filter(self, device_filter, timeout=10.0):
+        print(f"FIRST_SCAN {{(time.time() - spawned) * 1000:.1f}}", flush=True)
+        os._exit(0)
+
+async def adapter_ready():
+    return AdapterState(present=True, powered=True)
+
+session_scheduler.BleakScanner = FirstScan
+server.AdapterMonitor = lambda: AdapterMonitor(query=adapter_ready)
+sys.argv = sys.argv[:1] + {server_args!r}
+asyncio.run(server.main(sys.argv[1:]))
+"""
+
+
+def import_profile(entry: str, workdir: str, top: int) -> None:
+    env = dict(os.environ, PYTHONPATH=SERVER_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry}"],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # header line
+        modules.append((fields[2].strip(), self_us, cumulative_us))
+    if result.returncode != 0 or not modules:
+        sys.exit(f"import of {entry} failed:\n{result.stderr[-2000:]}")
+
+    total = next((c for name, _, c in modules if name == entry), max(c for _, _, c in modules))
+    by_package = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {entry}: {total / 1000:.1f} ms, {len(modules)} modules")
+    print(f"\n{'package (self time)':<40} {'ms':>8}")
+    for package, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"{package:<40} {us / 1000:>8.1f}")
+    print(f"\n{'module (cumulative)':<40} {'ms':>8}")
+    for name, _, cumulative in sorted(modules, key=lambda m: -m[2])[1:top + 1]:
+        print(f"{name:<40} {cumulative / 1000:>8.1f}")
+
+
+def time_to_first_scan(entry: str, workdir: str, server_args) -> float:
+    code = FIRST_SCAN_DRIVER.format(here=HERE, server=SERVER_DIR, entry=entry, server_args=list(server_args))
+    env = dict(os.environ, BENCH_SPAWNED_AT=repr(time.time()))
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=workdir, env=env, capture_output=True, text=True, timeout=60,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("FIRST_SCAN "):
+            return float(line.split()[1])
+    sys.exit(f"{entry} never started scanning:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start report")
+    parser.add_argument("--entry", default="gshock_server_display", choices=["gshock_server", "gshock_server_display"])
+    parser.add_argument("--budget-ms", type=float, default=2000.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    opts = parser.parse_args()
+
+    # The servers keep their data files in the working directory
+    with tempfile.TemporaryDirectory(prefix="gshock-startup-") as workdir:
+        import_profile(opts.entry, workdir, opts.top)
+
+        server_args = ["--display", "mock"] if opts.entry == "gshock_server_display" else []
+        times = sorted(time_to_first_scan(opts.entry, workdir, server_args) for _ in range(opts.runs))
+    median = times[len(times) // 2]
+    print(f"\ntime to first scan: median {median:.0f} ms, best {times[0]:.0f} ms, "
+          f"worst {times[-1]:.0f} ms (budget {opts.budget_ms:g} ms)")
+    if median > opts.budget_ms:
+        sys.exit("over budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+End-to-end benchmark: sync throughput of the session scheduler and the headless
+server's session handler against simulated watches.
+
+The BLE stack (scanner, connection, watch protocol) is replaced by stand-ins that
+only sleep for the configured latencies, so the numbers show how well the server
+overlaps sessions, and how much CPU time its own code costs per sync.
+
+    python benchmarks/bench_sync_loop.py [--watches N] [--seconds S] [--max-sessions 1,4]
+                                         [--scan-ms MS] [--connect-ms MS] [--rtt-ms MS]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from fakes import FakeWatches, Latencies
+
+
+async def run_config(watches: FakeWatches, max_sessions: int, seconds: float):
+    import gshock_server
+    import session_scheduler
+
+    watches.install(session_scheduler)
+    durations = []
+
+    def on_transition(session, old, new, seconds):
+        if new is session_scheduler.SessionState.DONE:
+            durations.append(session.elapsed())
+
+    scheduler = session_scheduler.SessionScheduler(gshock_server.flow, max_sessions=max_sessions)
+    scheduler.subscribe(on_transition)
+    cpu_start = time.process_time()
+    task = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    cpu = time.process_time() - cpu_start
+    return durations, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync loop benchmark with simulated watches")
+    parser.add_argument("--watches", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--max-sessions", type=str, default="1,4")
+    parser.add_argument("--scan-ms", type=float, default=200)
+    parser.add_argument("--connect-ms", type=float, default=1000)
+    parser.add_argument("--rtt-ms", type=float, default=60)
+    parser.add_argument("--disconnect-ms", type=float, default=100)
+    opts = parser.parse_args()
+
+    latencies = Latencies(
+        scan=opts.scan_ms / 1000,
+        connect=opts.connect_ms / 1000,
+        round_trip=opts.rtt_ms / 1000,
+        disconnect=opts.disconnect_ms / 1000,
+    )
+
+    # The server parses its own arguments on import and keeps its data files in the working directory
+    sys.argv = sys.argv[:1]
+    logging.getLogger("gshock_api.logger").setLevel(logging.WARNING)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="gshock-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            report(opts, latencies)
+        finally:
+            close_server()
+            os.chdir(cwd)
+
+
+def report(opts, latencies: Latencies) -> None:
+    print(f"{opts.watches} watches, scan {opts.scan_ms:g} ms, connect {opts.connect_ms:g} ms, "
+          f"round trip {opts.rtt_ms:g} ms, {opts.seconds:g} s per run")
+    print(f"{'sessions':>8} {'syncs/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'cpu ms/sync':>12}")
+    for max_sessions in (int(n) for n in opts.max_sessions.split(",")):
+        watches = FakeWatches(opts.watches, latencies)
+        durations, cpu = asyncio.run(run_config(watches, max_sessions, opts.seconds))
+        if not durations:
+            print(f"{max_sessions:>8} {'no syncs completed':>30}")
+            continue
+        p95 = statistics.quantiles(durations, n=20)[-1] if len(durations) > 1 else durations[0]
+        print(f"{max_sessions:>8} {len(durations) / opts.seconds:>8.2f} "
+              f"{statistics.median(durations) * 1000:>8.0f} {p95 * 1000:>8.0f} "
+              f"{cpu / len(durations) * 1000:>12.2f}")
+
+
+def close_server() -> None:
+    """Write out the server's data files while the temporary directory still exists."""
+    gshock_server = sys.modules.get("gshock_server")
+    if gshock_server is not None:
+        gshock_server.store.flush()
+        gshock_server.history.close()
+
+if __name__ == "__main__":
+    main()
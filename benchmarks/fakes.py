@@ -0,0 +1,194 @@
+"""
+Stand-ins for the hardware the server talks to, so benchmarks run on any Linux box:
+the SPI bus and GPIO pins of the LCD panels, the BLE scanner, connection and
+watch protocol, with configurable latencies, and the host clock reference.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import types
+from dataclasses import dataclass, field
+from typing import List
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "gshock-server")
+sys.path.insert(0, SERVER_DIR)
+
+CASIO_SERVICE_UUID = "00001804-0000-1000-8000-00805f9b34fb"
+
+
+class FakeSpiDev:
+    def __init__(self, *args):
+        self.max_speed_hz = 0
+        self.mode = 0
+        self.bytes_written = 0
+
+    def writebytes(self, data):
+        self.bytes_written += len(data)
+
+    def writebytes2(self, data):
+        self.bytes_written += len(memoryview(data).cast("B"))
+
+    def close(self):
+        pass
+
+
+class FakePin:
+    def __init__(self, *args, **kwargs):
+        self.value = 0
+        self.frequency = 0
+
+    def on(self):
+        pass
+
+    def off(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def install_fakes():
+    """Replace spidev and gpiozero before the LCD drivers are imported."""
+    sys.modules["spidev"] = types.SimpleNamespace(SpiDev=FakeSpiDev)
+    sys.modules["gpiozero"] = types.SimpleNamespace(
+        DigitalInputDevice=FakePin, DigitalOutputDevice=FakePin, PWMOutputDevice=FakePin
+    )
+
+
+def install_time_source():
+    """
+    Report the host clock as synchronized with zero offset, without running
+    timedatectl, chronyc or an NTP query, whose results depend on the machine.
+    """
+    from time_source import ClockStatus, time_source
+
+    async def measure():
+        return ClockStatus(source="fake", synchronized=True, uncertainty=0.0, measured_at=time.time())
+
+    time_source._measure = measure
+    time_source.status = ClockStatus(source="fake", synchronized=True, uncertainty=0.0, measured_at=time.time())
+
+
+@dataclass
+class Latencies:
+    """Simulated BLE timings, in seconds."""
+    scan: float = 0.2
+    connect: float = 1.0
+    round_trip: float = 0.06
+    # initialize_for_setting_time exchanges DST and world city settings before the time write
+    set_time_round_trips: int = 8
+    disconnect: float = 0.1
+
+
+@dataclass
+class FakeDevice:
+    address: str
+    name: str = "CASIO GW-B5600"
+
+
+@dataclass
+class FakeAdvertisement:
+    service_uuids: List[str] = field(default_factory=lambda: [CASIO_SERVICE_UUID])
+
+
+class FakeWatches:
+    """
+    A set of always-advertising watches. The scanner hands out the next one the
+    scheduler's filter accepts, in round-robin order, after the scan latency.
+    """
+
+    def __init__(self, count: int, latencies: Latencies, button: str = "LOWER_RIGHT"):
+        self.devices = [FakeDevice(f"AA:BB:CC:00:{i // 256:02X}:{i % 256:02X}") for i in range(count)]
+        self.latencies = latencies
+        self.button = button
+        self._next = 0
+
+    def scanner_class(self):
+        watches = self
+
+        class FakeScanner:
+            async def find_device_by_filter(self, device_filter, timeout=10.0):
+                await asyncio.sleep(watches.latencies.scan)
+                for i in range(len(watches.devices)):
+                    device = watches.devices[(watches._next + i) % len(watches.devices)]
+                    if device_filter(device, FakeAdvertisement()):
+                        watches._next = (watches._next + i + 1) % len(watches.devices)
+                        return device
+                return None
+
+        return FakeScanner
+
+    def connection_class(self):
+        latencies = self.latencies
+
+        class FakeClient:
+            is_connected = False
+
+        class FakeConnection:
+            def __init__(self, address=None, *args, **kwargs):
+                self.address = address
+                self.client = FakeClient()
+
+            async def connect(self):
+                await asyncio.sleep(latencies.connect)
+                self.client.is_connected = True
+                return True
+
+            async def disconnect(self):
+                await asyncio.sleep(latencies.disconnect)
+                self.client.is_connected = False
+
+        return FakeConnection
+
+    def api_class(self):
+        latencies = self.latencies
+        button = self.button
+
+        class FakeGshockAPI:
+            def __init__(self, connection):
+                self.connection = connection
+
+            async def _round_trips(self, n=1):
+                await asyncio.sleep(latencies.round_trip * n)
+
+            async def get_pressed_button(self):
+                from gshock_api.iolib.button_pressed_io import WatchButton
+                await self._round_trips()
+                return WatchButton[button]
+
+            async def initialize_for_setting_time(self):
+                await self._round_trips(latencies.set_time_round_trips - 1)
+
+            async def _set_time(self, current_time, offset=0):
+                await self._round_trips()
+
+            async def set_time(self, current_time=None, offset=0):
+                await self.initialize_for_setting_time()
+                await self._set_time(current_time, offset)
+
+            async def get_alarms(self):
+                await self._round_trips()
+                return [{"enabled": True, "hour": 7, "minute": 30}]
+
+            async def get_event_from_watch(self, index):
+                await self._round_trips()
+                return {"title": "Dentist", "enabled": True}
+
+            async def get_watch_condition(self):
+                await self._round_trips()
+                return {"battery_level_percent": 80, "temperature": 21}
+
+            async def get_time_adjustment(self):
+                await self._round_trips()
+                return True
+
+        return FakeGshockAPI
+
+    def install(self, session_scheduler_module):
+        """Point the session scheduler at the fake BLE stack, and the server at a fake clock reference."""
+        install_time_source()
+        session_scheduler_module.BleakScanner = self.scanner_class()
+        session_scheduler_module.Connection = self.connection_class()
+        session_scheduler_module.GshockAPI = self.api_class()
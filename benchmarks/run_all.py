@@ -0,0 +1,35 @@
+"""
+Runs every benchmark in this directory with short settings, one after another.
+No Bluetooth adapter, watch or display is needed.
+
+    python benchmarks/run_all.py
+"""
+
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS = [
+    ("RGB565 packing and SPI transfer", ["bench_rgb565.py", "--frames", "50"]),
+    ("Display frames", ["bench_display.py", "--frames", "50"]),
+    ("Sync loop with simulated watches", ["bench_sync_loop.py", "--seconds", "5"]),
+    ("Cold start", ["bench_startup.py", "--runs", "3"]),
+]
+
+
+def main():
+    failed = []
+    for title, command in BENCHMARKS:
+        print(f"== {title}")
+        result = subprocess.run([sys.executable, os.path.join(HERE, command[0]), *command[1:]])
+        if result.returncode != 0:
+            failed.append(command[0])
+        print()
+    if failed:
+        sys.exit(f"failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
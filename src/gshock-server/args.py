@@ -15,6 +15,11 @@ class Args:
             default=0,
             help="Fine adjustment in seconds to add/subtract when setting time (-10 to 10)"
         )        
+        parser.add_argument(
+            "--latency-compensation",
+            action="store_true",
+            help="Measure BLE write latency per watch model and correct the time to the sub-second"
+        )
         parser.add_argument(
              "--display",
              type=str,
@@ -22,6 +27,72 @@ class Args:
              default="mock",
              help="Select display type: mock, waveshare, or tft154"
          )
+        parser.add_argument(
+            "--max-sessions",
+            type=int,
+            default=4,
+            help="Maximum number of watches served at the same time"
+        )
+        parser.add_argument(
+            "--session-timeout",
+            type=float,
+            default=60.0,
+            help="Seconds before an unresponsive watch session is dropped"
+        )
+        parser.add_argument(
+            "--cache-max-age-hours",
+            type=float,
+            default=24.0,
+            help="Hours the status screen shows cached alarms and reminders before reading them from the watch again"
+        )
+        parser.add_argument(
+            "--adaptive-scan",
+            action="store_true",
+            help="Scan continuously only around learned auto-sync times, and at a low duty cycle otherwise"
+        )
+        parser.add_argument(
+            "--time-reference",
+            type=str,
+            default="system",
+            help="Reference for checking the host clock: system (NTP sync status only), chrony, or ntp:HOST[:PORT]"
+        )
+        parser.add_argument(
+            "--max-clock-error-ms",
+            type=float,
+            default=500.0,
+            help="Host clock uncertainty above which a sync is flagged or refused"
+        )
+        parser.add_argument(
+            "--clock-error-policy",
+            choices=["flag", "refuse"],
+            default="flag",
+            help="When the host clock cannot be trusted: flag (warn and sync anyway) or refuse to set the time"
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=None,
+            help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics"
+        )
+        parser.add_argument(
+            "--metrics-file",
+            type=str,
+            default=None,
+            help="Periodically write Prometheus metrics to this file (textfile collector)"
+        )
+        parser.add_argument(
+            "--trace",
+            type=str,
+            default=None,
+            metavar="FILE",
+            help="Record how long each phase of every watch session takes to FILE"
+        )
+        parser.add_argument(
+            "--trace-format",
+            choices=["jsonl", "chrome"],
+            default="jsonl",
+            help="Trace file format: JSON lines, or Chrome trace events (chrome://tracing, Perfetto)"
+        )
         parser.add_argument(
             "-l", "--log_level", default="INFO", help="Sets log level", required=False
         )
@@ -31,4 +102,22 @@ class Args:
     def get(self):
         return self.args
 
-args = Args().get()
+_parsed = None
+
+
+def get_args():
+    global _parsed
+    if _parsed is None:
+        _parsed = Args().get()
+    return _parsed
+
+
+class _LazyArgs:
+    """Parses the command line on first use rather than when a module imports it."""
+
+    def __getattr__(self, name):
+        return getattr(get_args(), name)
+
+
+args = _LazyArgs()
+
@@ -1,14 +1,164 @@
-import subprocess
-import time
-
-def ensure_bt_ready():
-    for _ in range(10):
-        try:
-            output = subprocess.check_output(["bluetoothctl", "show"]).decode()
-            if "Powered: yes" in output:
-                return True
-            subprocess.run(["bluetoothctl", "power", "on"], input=b"yes\n", timeout=2)
-        except Exception:
-            pass
-        time.sleep(1)
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from gshock_api.logger import logger
+
+
+@dataclass(frozen=True)
+class AdapterState:
+    present: bool = False
+    powered: bool = False
+    discovering: bool = False
+    address: str = ""
+
+    @property
+    def ready(self) -> bool:
+        return self.present and self.powered
+
+
+def parse_show(output: str) -> AdapterState:
+    """Parse the output of `bluetoothctl show`."""
+    if "Controller" not in output:
+        # "No default controller available"
+        return AdapterState()
+    address = ""
+    fields = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith("Controller "):
+            address = line.split()[1]
+        elif ":" in line:
+            key, _, value = line.partition(":")
+            fields[key.strip()] = value.strip()
+    return AdapterState(
+        present=True,
+        powered=fields.get("Powered") == "yes",
+        discovering=fields.get("Discovering") == "yes",
+        address=address,
+    )
+
+
+async def _bluetoothctl(*args: str, stdin: Optional[bytes] = None, timeout: float = 5.0) -> str:
+    proc = await asyncio.create_subprocess_exec(
+        "bluetoothctl", *args,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(stdin), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return out.decode(errors="replace")
+
+
+async def query_adapter() -> Optional[AdapterState]:
+    """
+    The adapter state, or None when it cannot be found out: bluetoothctl is not
+    installed (macOS, Windows, Linux without BlueZ utils) or does not answer.
+    """
+    try:
+        return parse_show(await _bluetoothctl("show"))
+    except (OSError, asyncio.TimeoutError) as e:
+        logger.debug(f"bluetoothctl show failed: {e}")
+        return None
+
+
+async def power_on() -> None:
+    try:
+        await _bluetoothctl("power", "on", stdin=b"yes\n", timeout=2.0)
+    except (OSError, asyncio.TimeoutError) as e:
+        logger.debug(f"bluetoothctl power on failed: {e}")
+
+
+async def ensure_bt_ready(attempts: int = 10, interval: float = 1.0) -> bool:
+    for _ in range(attempts):
+        state = await query_adapter()
+        if state is None:
+            # Nothing here can check or power the adapter; leave it to bleak
+            return True
+        if state.ready:
+            return True
+        await power_on()
+        await asyncio.sleep(interval)
     return False
+
+
+AdapterListener = Callable[[AdapterState, AdapterState], None]
+
+
+class AdapterMonitor:
+    """
+    Polls the Bluetooth adapter in a background task and publishes changes
+    (adapter appearing or disappearing, power on or off) to listeners.
+    The sync loop waits on wait_ready() instead of scanning a dead adapter.
+
+    query is the probe; pass a stand-in to run without BlueZ. When it returns
+    None the state is unknown (state is None) and counts as ready, so only an
+    adapter that was actually seen down holds up scanning.
+    """
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        query: Callable[[], Awaitable[Optional[AdapterState]]] = query_adapter,
+    ):
+        self.interval = interval
+        self.query = query
+        self.state: Optional[AdapterState] = None
+
+        self._listeners: List[AdapterListener] = []
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, listener: AdapterListener) -> None:
+        """listener(old, new) is called on the event loop whenever the state changes."""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def refresh(self) -> Optional[AdapterState]:
+        state = await self.query()
+        if state is None:
+            if self.state is not None or not self._ready.is_set():
+                logger.info("Bluetooth adapter state unknown, scanning anyway")
+            self.state = None
+            self._ready.set()
+        elif state != self.state:
+            self._publish(self.state or AdapterState(), state)
+        return state
+
+    async def wait_ready(self) -> None:
+        await self._ready.wait()
+
+    def _publish(self, old: AdapterState, new: AdapterState) -> None:
+        self.state = new
+        if new.ready:
+            self._ready.set()
+        else:
+            self._ready.clear()
+        status = "powered on" if new.ready else "powered off" if new.present else "not available"
+        logger.info(f"Bluetooth adapter {new.address} {status}" if new.address else f"Bluetooth adapter {status}")
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                logger.error(f"Got error in adapter listener: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Bluetooth adapter check failed: {e}")
+            await asyncio.sleep(self.interval)
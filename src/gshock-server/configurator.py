@@ -1,39 +1,135 @@
 import os
-from configparser import ConfigParser
+import threading
+import time
+from configparser import ConfigParser, InterpolationError
+from typing import Callable, Dict, List, Optional, Tuple
+
+from gshock_api.logger import logger
+
+ConfigListener = Callable[[str, Optional[str], Optional[str]], None]
+
 
 class Configurator:
-    def __init__(self, path=None) -> None:
+    """
+    The [main] section of ~/.config/gshock/config.ini.
+
+    The parsed file is cached. It is re-read only when its modification time
+    or size changes, and the file is stat'ed at most once per check_interval
+    seconds, so get() normally does no disk I/O at all. Edits made to the file
+    by hand are still picked up while the server runs, and reported to the
+    listeners registered with subscribe(). Nothing polls the file, though: an
+    outside edit is only noticed, and reported, by the next get() or set().
+    """
+
+    def __init__(self, path=None, check_interval: float = 1.0) -> None:
         default_dir = os.path.join(os.path.expanduser("~"), ".config", "gshock")
         default_path = os.path.join(default_dir, "config.ini")
 
         self.path = path or default_path
+        self.check_interval = check_interval
 
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._listeners: List[ConfigListener] = []
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked_at: Optional[float] = None
+        self._values: Dict[str, str] = {}
 
-        self.config = ConfigParser()
+        # Load existing file if present. Nothing is written until the first set(),
+        # so importing this module has no side effects on disk.
+        self.config = self._read()
 
-        # Load existing file if present
-        if os.path.exists(self.path):
-            self.config.read(self.path)
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
 
-        if not self.config.has_section("main"):
-            self.config.add_section("main")
-            self._save()
+    def _read(self) -> ConfigParser:
+        config = ConfigParser()
+        self._stamp = self._file_stamp()
+        if self._stamp is not None:
+            config.read(self.path)
+        if not config.has_section("main"):
+            config.add_section("main")
+        self._values = {}
+        for key in config.options("main"):
+            # One bad value (e.g. a stray %) should not make the whole file unreadable
+            try:
+                self._values[key] = config.get("main", key)
+            except InterpolationError as e:
+                logger.warning(f"Ignoring {key} in {self.path}: {e}")
+        return config
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        if self._file_stamp() == self._stamp:
+            return
 
-    def get(self, key):
-        self.config.read(self.path)
+        old = self._values
+        self.config = self._read()
+        for key in sorted(set(old) | set(self._values)):
+            if old.get(key) != self._values.get(key):
+                self._notify(key, old.get(key), self._values.get(key))
+
+    def _notify(self, key: str, old: Optional[str], new: Optional[str]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(key, old, new)
+            except Exception as e:
+                logger.error(f"Got error in config listener: {e}")
+
+    def subscribe(self, listener: ConfigListener) -> None:
+        """
+        listener(key, old, new) is called when a value changes, by set() or in the
+        file; a change in the file is seen by the first get() or set() after it.
+        """
+        self._listeners.append(listener)
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._refresh()
+            return self._values.get(key, default)
+
+    def get_int(self, key, default: Optional[int] = None) -> Optional[int]:
+        value = self.get(key)
         try:
-            return self.config.get("main", key)
-        except Exception:
-            return None
+            return int(value) if value is not None else default
+        except ValueError:
+            return default
+
+    def get_float(self, key, default: Optional[float] = None) -> Optional[float]:
+        value = self.get(key)
+        try:
+            return float(value) if value is not None else default
+        except ValueError:
+            return default
+
+    def get_bool(self, key, default: Optional[bool] = None) -> Optional[bool]:
+        value = self.get(key)
+        if value is None:
+            return default
+        return ConfigParser.BOOLEAN_STATES.get(value.strip().lower(), default)
 
     def set(self, key, value):
-        self.config.set("main", key, value)
-        self._save()
+        with self._lock:
+            self._refresh()
+            old = self._values.get(key)
+            self.config.set("main", key, str(value))
+            self._values[key] = str(value)
+            self._save()
+        if old != str(value):
+            self._notify(key, old, str(value))
 
     def _save(self):
+        # Ensure directory exists
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
         with open(self.path, "w") as f:
             self.config.write(f)
+        # Our own write is not an external change
+        self._stamp = self._file_stamp()
 
 conf = Configurator()
@@ -1,11 +1,57 @@
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFont
 from datetime import datetime
+from functools import lru_cache
+import os
+import time
 
+from metrics import frame_transfer_seconds
+from tracing import span
 
-font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
-font_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 20)
-font_extra_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 24)
+
+FONT_DIR = "/usr/share/fonts/truetype/dejavu"
+FONTS = {
+    "small": ("DejaVuSans.ttf", 16),
+    "large": ("DejaVuSans-Bold.ttf", 20),
+    "extra_large": ("DejaVuSans.ttf", 24),
+}
+
+
+@lru_cache(maxsize=None)
+def font(name):
+    """Fonts are loaded on first use, not at import."""
+    filename, size = FONTS[name]
+    return ImageFont.truetype(os.path.join(FONT_DIR, filename), size)
+
+
+def __getattr__(name):
+    # Keeps display.display.font_small and friends working
+    if name.startswith("font_") and name[5:] in FONTS:
+        return font(name[5:])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Scratch surface for text measurement; textbbox does not depend on the image content.
+_measure_draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+@lru_cache(maxsize=256)
+def text_bbox(font, text):
+    """Memoized draw.textbbox((0, 0), text, font=font)."""
+    return _measure_draw.textbbox((0, 0), text, font=font)
+
+@lru_cache(maxsize=128)
+def text_strip(font, text):
+    """Render text once into an "L" mask cropped to its bounding box."""
+    left, top, right, bottom = text_bbox(font, text)
+    strip = Image.new("L", (right - left, bottom - top), 0)
+    ImageDraw.Draw(strip).text((-left, -top), text, font=font, fill=255)
+    return strip
+
+def draw_text(image, xy, text, font, fill=(255, 255, 255)):
+    """Equivalent of draw.text(xy, text, font=font, fill=fill) using the cached glyph strip."""
+    left, top, _, _ = text_bbox(font, text)
+    strip = text_strip(font, text)
+    if strip.width and strip.height:
+        image.paste(fill, (xy[0] + left, xy[1] + top), strip)
 
 def generate_battery_icon(percent: int, width=20, height=10) -> Image.Image:
     """Generates a battery icon as a color image for preview.
@@ -27,6 +73,94 @@ def generate_battery_icon(percent: int, width=20, height=10) -> Image.Image:
         draw.rectangle([1 + fill_width, 1, width - 2, height - 2], fill=(0, 0, 0))
     return icon
 
+@lru_cache(maxsize=1)
+def battery_atlas(width=20, height=10, scale=1.5):
+    """
+    All 101 battery levels, generated and upscaled once, stacked vertically in one image.
+    """
+    icon_w = int((width + 3) * scale)
+    icon_h = int(height * scale)
+    atlas = Image.new("RGB", (icon_w, icon_h * 101), color=(0, 0, 0))
+    for percent in range(101):
+        icon = generate_battery_icon(percent, width, height).resize((icon_w, icon_h), Image.LANCZOS)
+        atlas.paste(icon, (0, percent * icon_h))
+    return atlas
+
+def battery_sprite(percent: int) -> Image.Image:
+    """The scaled battery icon for a level, cut from the atlas."""
+    atlas = battery_atlas()
+    icon_h = atlas.height // 101
+    top = max(0, min(percent, 100)) * icon_h
+    return atlas.crop((0, top, atlas.width, top + icon_h))
+
+def dirty_regions(previous, current, band_height=16):
+    """
+    Return the (left, top, right, bottom) boxes where current differs from previous.
+
+    The frame is scanned in horizontal bands; vertically adjacent changed bands are
+    merged, so a changed text line typically yields a single tight box.
+    """
+    width, height = current.size
+    if previous is None or previous.size != current.size or previous.mode != current.mode:
+        return [(0, 0, width, height)]
+
+    diff = ImageChops.difference(previous, current)
+    if diff.getbbox() is None:
+        return []
+
+    regions = []
+    for band_top in range(0, height, band_height):
+        band_bottom = min(band_top + band_height, height)
+        bbox = diff.crop((0, band_top, width, band_bottom)).getbbox()
+        if bbox is None:
+            continue
+        left, top, right, bottom = bbox[0], band_top + bbox[1], bbox[2], band_top + bbox[3]
+        if regions and regions[-1][3] == top:
+            last = regions[-1]
+            regions[-1] = (min(last[0], left), last[1], max(last[2], right), bottom)
+        else:
+            regions.append((left, top, right, bottom))
+    return regions
+
+@lru_cache(maxsize=4)
+def load_background(img_path, width, height):
+    """Decode and resize a background image once per path and display size."""
+    try:
+        return Image.open(img_path).convert("RGB").resize((width, height))
+    except FileNotFoundError:
+        print(f"❌ Background image '{img_path}' not found. Using black fallback.")
+        return Image.new("RGB", (width, height), "BLACK")
+
+@lru_cache(maxsize=16)
+def render_text_layer(lines, width, height, font, margin, line_spacing):
+    """
+    Render bottom-aligned, centered lines into an "L" mask the size of the display.
+    Cached by content, so repeated messages skip text layout entirely.
+    """
+    layer = Image.new("L", (width, height), 0)
+    draw = ImageDraw.Draw(layer)
+
+    # Measure each line's size
+    line_sizes = [text_bbox(font, line) for line in lines]
+    line_widths = [bbox[2] - bbox[0] for bbox in line_sizes]
+    line_heights = [bbox[3] - bbox[1] for bbox in line_sizes]
+
+    total_text_height = sum(line_heights) + line_spacing * (len(lines) - 1)
+
+    # Compute vertical starting point (bottom-aligned)
+    start_y = height - total_text_height - margin
+
+    # Draw all lines centered
+    y = start_y
+    for i, line in enumerate(lines):
+        text_w = line_widths[i]
+        text_h = line_heights[i]
+        x = (width - text_w) // 2
+        draw.text((x, y), line, font=font, fill=255)
+        y += text_h + line_spacing
+
+    return layer
+
 def show_welcome_screen(self, message, watch_name=None, last_sync=None):
     """
     Display a multi-line message at the bottom of the screen over a background image.
@@ -34,21 +168,12 @@ def show_welcome_screen(self, message, watch_name=None, last_sync=None):
     All lines are horizontally centered.
     """
     # font = self.font_extra_large if hasattr(self, 'font_extra_large') else ImageFont.load_default()
-    font = font_small
+    text_font = font("small")
     margin = 5  # Bottom margin in pixels
     line_spacing = 4  # Pixels between lines
 
-    # Load background image
-    try:
-        img_path = "gshock-server-dist/display/pic/dw-b5600.png" if hasattr(self, 'output_file') \
-            else "display/pic/dw-b5600.png"
-
-        image = Image.open(img_path).convert("RGB").resize((self.width, self.height))
-    except FileNotFoundError:
-        print(f"❌ Background image '{img_path}' not found. Using black fallback.")
-        image = Image.new("RGB", (self.width, self.height), "BLACK")
-
-    draw = ImageDraw.Draw(image)
+    img_path = "gshock-server-dist/display/pic/dw-b5600.png" if hasattr(self, 'output_file') \
+        else "display/pic/dw-b5600.png"
 
     # Compose all lines to be displayed
     lines = []
@@ -62,78 +187,45 @@ def show_welcome_screen(self, message, watch_name=None, last_sync=None):
     message_lines = message.strip().split('\n')
     lines.extend(message_lines)
 
-    # Measure each line's size
-    line_sizes = [draw.textbbox((0, 0), line, font=font) for line in lines]
-    line_widths = [bbox[2] - bbox[0] for bbox in line_sizes]
-    line_heights = [bbox[3] - bbox[1] for bbox in line_sizes]
-
-    total_text_height = sum(line_heights) + line_spacing * (len(lines) - 1)
-
-    # Compute vertical starting point (bottom-aligned)
-    start_y = self.height - total_text_height - margin
-
-    # Draw all lines centered
-    y = start_y
-    for i, line in enumerate(lines):
-        text_w = line_widths[i]
-        text_h = line_heights[i]
-        x = (self.width - text_w) // 2
-        draw.text((x, y), line, font=font, fill=(255, 255, 255))
-        y += text_h + line_spacing
+    # Composite the cached text layer over the cached background
+    image = load_background(img_path, self.width, self.height).copy()
+    text_layer = render_text_layer(tuple(lines), self.width, self.height, text_font, margin, line_spacing)
+    image.paste((255, 255, 255), (0, 0), text_layer)
 
     # Display the image
-    if hasattr(self, "disp") and hasattr(self.disp, "ShowImage"):
-        self.disp.ShowImage(image)
-    elif hasattr(self, "device") and hasattr(self.device, "display"):
-        self.device.display(image)
-    elif hasattr(self, "output_file"):
-        image.save(self.output_file)
-
-    # Save for use in overlays (e.g., blinking dot)
-    self.last_image = image.copy()
+    self.present(image)
 
 def draw_status(draw, image, width, height, font_large, font_small,
                 watch_name, battery, temperature, last_sync, alarm, reminder, auto_sync,
                 margin=8):
 
     # Header (centered at the top)
-    bbox = draw.textbbox((0, 0), watch_name, font=font_large)
+    bbox = text_bbox(font_large, watch_name)
     w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
-    draw.text(((width - w) // 2, margin), watch_name, font=font_large, fill=(255, 255, 255))
+    draw_text(image, ((width - w) // 2, margin), watch_name, font_large)
 
     # Temperature string — draw it at bottom-left
     temp_str = f"{temperature}°C"
-    bbox_temp = draw.textbbox((0, 0), temp_str, font=font_small)
+    bbox_temp = text_bbox(font_small, temp_str)
     temp_h = bbox_temp[3] - bbox_temp[1]
     temp_x = margin
     temp_y = height - temp_h - margin
-    draw.text((temp_x, temp_y), temp_str, font=font_small, fill=(255, 255, 255))
+    draw_text(image, (temp_x, temp_y), temp_str, font_small)
 
-    # Battery icon — make it longer (wider horizontally)
-    battery_level = int(str(battery).strip('%')) if isinstance(battery, str) else int(battery)
-    battery_icon = generate_battery_icon(battery_level)
+    # Battery icon — make it longer (wider horizontally); left out when the level is unknown
+    if battery is not None:
+        battery_level = int(str(battery).strip('%')) if isinstance(battery, str) else int(battery)
+        battery_icon = battery_sprite(battery_level)
 
-    # Stretch battery icon width-wise (1.8x) and height-wise slightly (1.3x)
-    scale_x = 1.5
-    scale_y = 1.5
-    new_size = (int(battery_icon.width * scale_x), int(battery_icon.height * scale_y))
-    battery_icon = battery_icon.resize(new_size, Image.LANCZOS)
-
-    # Position battery icon at bottom-right
-    icon_x = width - battery_icon.width - margin
-    icon_y = height - battery_icon.height - margin
-    image.paste(battery_icon, (icon_x, icon_y))
+        # Position battery icon at bottom-right
+        icon_x = width - battery_icon.width - margin
+        icon_y = height - battery_icon.height - margin
+        image.paste(battery_icon, (icon_x, icon_y))
 
     # Info text (middle of screen, below header)
     y = h + margin * 2 + 12 + 10
 
-    if isinstance(last_sync, datetime):
-        delta = datetime.now() - last_sync
-        hours = delta.seconds // 3600
-        minutes = (delta.seconds % 3600) // 60
-        last_sync_str = f"{hours:02}:{minutes:02} since sync"
-    else:
-        last_sync_str = str(last_sync).strip() if last_sync else ""
+    last_sync_str = format_last_sync(last_sync)
 
     info = [
         ("Last Sync:", last_sync_str),
@@ -142,15 +234,31 @@ def draw_status(draw, image, width, height, font_large, font_small,
         ("Auto Sync:", auto_sync)
     ]
 
+    layout = {}
     for label, value in info:
         str_value = str(value).strip() if value is not None else ""
-        draw.text((margin, y), label, font=font_small, fill=(255, 255, 255))
-        bbox_val = draw.textbbox((0, 0), str_value, font=font_small)
+        draw_text(image, (margin, y), label, font_small)
+        bbox_val = text_bbox(font_small, str_value)
         val_w = bbox_val[2] - bbox_val[0]
         val_h = bbox_val[3] - bbox_val[1]
-        draw.text((width - val_w - margin, y), str_value, font=font_small, fill=(255, 255, 255))
+        draw_text(image, (width - val_w - margin, y), str_value, font_small)
+        if label == "Last Sync:":
+            # Everything right of the label, down to the next row, belongs to the value
+            label_right = margin + text_bbox(font_small, label)[2]
+            layout["last_sync"] = ((label_right + 1, y, width - 1, y + val_h + margin - 1), y)
         y += val_h + margin
-            
+
+    # Where updatable fields live, for partial redraws
+    return layout
+
+def format_last_sync(last_sync):
+    """A datetime becomes "HH:MM since sync"; anything else is shown as is."""
+    if isinstance(last_sync, datetime):
+        minutes_total = int((datetime.now() - last_sync).total_seconds()) // 60
+        hours, minutes = divmod(max(0, minutes_total), 60)
+        return f"{hours:02}:{minutes:02} since sync"
+    return str(last_sync).strip() if last_sync else ""
+
 class Display:
     def __init__(self, draw, image, width=240, height=240):
         self.draw = draw
@@ -165,14 +273,64 @@ class Display:
         self.draw.rectangle((0, 0, self.width, self.height), fill=0)
 
         # Use the shared drawing function
-        draw_status(
+        self._status_layout = draw_status(
             self.draw, self.image, self.width, self.height,
-            font_large, font_small,
+            font("large"), font("small"),
             watch_name, battery, temperature, last_sync, alarm, reminder, auto_sync,
             margin=MARGIN
         )
+        self._status_margin = MARGIN
+        self._last_sync = last_sync
 
         return self.image
 
     def show_welcome_screen(self, message, watch_name=None, last_sync=None):
+        # The status canvas is no longer on screen, so there is nothing to tick
+        self._status_layout = None
         show_welcome_screen(self, message, watch_name, last_sync)
+
+    def tick_last_sync(self):
+        """
+        Redraw only the "since sync" value of the status screen currently shown.
+        Cheap enough to run every minute: one small text paste and a partial panel update.
+        """
+        layout = getattr(self, "_status_layout", None)
+        if not layout or "last_sync" not in layout or not isinstance(self._last_sync, datetime):
+            return
+
+        box, y = layout["last_sync"]
+        text = format_last_sync(self._last_sync)
+        bbox = text_bbox(font("small"), text)
+        self.draw.rectangle(box, fill=0)
+        draw_text(self.image, (self.width - (bbox[2] - bbox[0]) - self._status_margin, y), text, font("small"))
+        self.present(self.image)
+
+    def present(self, image):
+        """
+        Push a frame to the output. On panels that support windowed writes,
+        only the regions that changed since the last frame go over SPI.
+        """
+        with span("display.present") as s:
+            start = time.perf_counter()
+            mode = "none"
+            if hasattr(self, "disp") and hasattr(self.disp, "ShowImage"):
+                regions = dirty_regions(getattr(self, "last_image", None), image)
+                changed_area = sum((r - l) * (b - t) for l, t, r, b in regions)
+                if changed_area > self.width * self.height // 2 or not hasattr(self.disp, "ShowImageRegions"):
+                    self.disp.ShowImage(image)
+                    mode = "full"
+                elif regions:
+                    self.disp.ShowImageRegions(image, regions)
+                    mode = "regions"
+            elif hasattr(self, "device") and hasattr(self.device, "display"):
+                self.device.display(image)
+                mode = "device"
+            elif hasattr(self, "output_file"):
+                image.save(self.output_file)
+                mode = "file"
+            frame_transfer_seconds.observe(time.perf_counter() - start, mode=mode)
+            s.set(mode=mode)
+
+        # Save for diffing the next frame and for use in overlays (e.g., blinking dot)
+        self.last_image = image.copy()
+
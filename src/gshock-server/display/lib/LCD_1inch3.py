@@ -126,22 +126,25 @@ class LCD_1inch3(lcdconfig.RaspberryPi):
         if imwidth != self.width or imheight != self.height:
             raise ValueError('Image must be same dimensions as display \
                 ({0}x{1}).' .format(self.width, self.height))
-        img = self.np.asarray(Image)
-        pix = self.np.zeros((self.width,self.height,2), dtype = self.np.uint8)
-        pix[...,[0]] = self.np.add(self.np.bitwise_and(img[...,[0]],0xF8),self.np.right_shift(img[...,[1]],5))
-        pix[...,[1]] = self.np.add(self.np.bitwise_and(self.np.left_shift(img[...,[1]],3),0xE0),self.np.right_shift(img[...,[2]],3))
-        pix = pix.flatten().tolist()
+        pix = self.to_rgb565(Image)
         self.SetWindows ( 0, 0, self.width, self.height)
         self.digital_write(self.DC_PIN,True)
-        for i in range(0,len(pix),4096):
-            self.spi_writebyte(pix[i:i+4096])		
+        self.spi_writebytes2(pix)		
+
+    def ShowImageRegions(self,Image,boxes):
+        """Write only the given (left, top, right, bottom) boxes of a full-size image to the display"""
+        pix = self.to_rgb565(Image).reshape(self.height, self.width * 2)
+        for left, top, right, bottom in boxes:
+            region = self.np.ascontiguousarray(pix[top:bottom, left * 2:right * 2])
+            self.SetWindows ( left, top, right, bottom)
+            self.digital_write(self.DC_PIN,True)
+            self.spi_writebytes2(region)
         
     def clear(self):
         """Clear contents of image buffer"""
-        _buffer = [0xff]*(self.width * self.height * 2)
+        _buffer = bytes([0xff]) * (self.width * self.height * 2)
         self.SetWindows ( 0, 0, self.width, self.height)
         self.digital_write(self.DC_PIN,True)
-        for i in range(0,len(_buffer),4096):
-            self.spi_writebyte(_buffer[i:i+4096])	        
+        self.spi_writebytes2(_buffer)
         
 
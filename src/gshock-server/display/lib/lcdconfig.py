@@ -27,6 +27,7 @@
 # THE SOFTWARE.
 #
 
+import sys
 import time
 import spidev
 import logging
@@ -47,6 +48,10 @@ class RaspberryPi:
         self.BL_PIN = self.gpio_pwm(bl)
         self.bl_DutyCycle(0)
         
+        # Reusable RGB565 frame buffers, allocated on first use
+        self._frame = None
+        self._scratch = None
+
         #Initialize SPI
         self.SPI = spi
         if self.SPI is not None :
@@ -78,6 +83,41 @@ class RaspberryPi:
         if self.SPI is not None :
             self.SPI.writebytes(data)
 
+    def spi_writebytes2(self, data):
+        """Write a buffer (bytes, memoryview, numpy array) without building a Python list."""
+        if self.SPI is None:
+            return
+        if hasattr(self.SPI, "writebytes2"):
+            # writebytes2 splits large buffers into bus-sized transfers itself
+            self.SPI.writebytes2(data)
+        else:
+            view = memoryview(data).cast("B")
+            for i in range(0, len(view), 4096):
+                self.SPI.writebytes(list(view[i:i + 4096]))
+
+    def to_rgb565(self, image):
+        """Pack an RGB PIL image into a reusable big-endian RGB565 buffer, in one vectorized pass."""
+        img = self.np.asarray(image)
+        shape = img.shape[:2]
+        if self._frame is None or self._frame.shape != shape:
+            self._frame = self.np.empty(shape, dtype=self.np.uint16)
+            self._scratch = self.np.empty(shape, dtype=self.np.uint16)
+        frame, scratch = self._frame, self._scratch
+
+        # RRRRRGGG GGGBBBBB
+        self.np.bitwise_and(img[..., 0], 0xF8, out=frame, casting="unsafe")
+        self.np.left_shift(frame, 8, out=frame)
+        self.np.bitwise_and(img[..., 1], 0xFC, out=scratch, casting="unsafe")
+        self.np.left_shift(scratch, 3, out=scratch)
+        self.np.bitwise_or(frame, scratch, out=frame)
+        self.np.right_shift(img[..., 2], 3, out=scratch, casting="unsafe")
+        self.np.bitwise_or(frame, scratch, out=frame)
+
+        # The panel expects the high byte first
+        if sys.byteorder == "little":
+            frame.byteswap(inplace=True)
+        return frame.view(self.np.uint8)
+
     def bl_DutyCycle(self, duty):
         self.BL_PIN.value = duty / 100
         
@@ -13,5 +13,5 @@ class MockDisplay(Display):
         super().show_status(watch_name, battery, temperature, last_sync, alarm, reminder, auto_sync)
 
         # Save image
-        self.image.save(self.output_file)
+        self.present(self.image)
 
@@ -1,5 +1,6 @@
 from luma.core.interface.serial import spi
 from luma.lcd.device import st7789
+from luma.core.framebuffer import diff_to_previous
 from display.display import Display
 from PIL import Image, ImageDraw
     
@@ -10,7 +11,9 @@ class TFT154Display(Display):
         self.width = width
         self.height = height
         serial = spi(port=0, device=0, gpio_DC=24, gpio_RST=25)
-        self.device = st7789(serial, width=240, height=240, rotate=0)
+        # luma sends only the changed segments of each frame
+        self.device = st7789(serial, width=240, height=240, rotate=0,
+                             framebuffer=diff_to_previous(num_segments=16))
         
         self.image = Image.new("RGB", (self.width, self.height), color=0)
         self.draw = ImageDraw.Draw(self.image)
@@ -18,6 +21,6 @@ class TFT154Display(Display):
     def show_status(self, watch_name, battery, temperature, last_sync, alarm, reminder, auto_sync):
         super().show_status(watch_name, battery, temperature, last_sync, alarm, reminder, auto_sync)
 
-        self.device.display(self.image)
+        self.present(self.image)
 
 
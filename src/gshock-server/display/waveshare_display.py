@@ -18,5 +18,5 @@ class WaveshareDisplay(Display):
     def show_status(self, watch_name, battery, temperature, last_sync, alarm, reminder, auto_sync):
         super().show_status(watch_name, battery, temperature, last_sync, alarm, reminder, auto_sync)
 
-        self.disp.ShowImage(self.image)
+        self.present(self.image)
  
\ No newline at end of file
@@ -0,0 +1,91 @@
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+from gshock_api.logger import logger
+from metrics import frame_render_seconds
+from tracing import span
+
+
+class DisplayWorker:
+    """
+    Runs display calls (PIL rendering and SPI transfer) on a dedicated thread,
+    so the BLE event loop only enqueues work and never waits for a frame.
+
+    The queue holds a single pending request: a newer request replaces one
+    that has not started yet, so the screen always catches up to the latest
+    state and superseded frames are dropped.
+
+    Pass factory instead of display to build the display on the worker thread
+    when the first frame arrives, which keeps PIL, numpy and the panel drivers
+    (and the panel's init sequence) off the startup path.
+    """
+
+    def __init__(self, display: Any = None, factory: Optional[Callable[[], Any]] = None):
+        self.display = display
+        self.factory = factory
+        self.dropped_frames = 0
+        self.rendered_frames = 0
+
+        self._pending: Optional[Tuple[str, tuple, dict]] = None
+        self._busy = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, method: str, *args, **kwargs) -> None:
+        with self._cond:
+            if self._pending is not None:
+                self.dropped_frames += 1
+            self._pending = (method, args, kwargs)
+            self._start()
+            self._cond.notify_all()
+
+    def show_status(self, *args, **kwargs) -> None:
+        self.submit("show_status", *args, **kwargs)
+
+    def show_welcome_screen(self, *args, **kwargs) -> None:
+        self.submit("show_welcome_screen", *args, **kwargs)
+
+    def tick(self) -> None:
+        """Refresh the time since the last sync, unless a real frame is already waiting."""
+        with self._cond:
+            # Nothing has been drawn yet, so there is no status screen to tick
+            if self._pending is not None or self.display is None:
+                return
+            self._pending = ("tick_last_sync", (), {})
+            self._start()
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted frame has been drawn. For shutdown and benchmarks."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def _start(self) -> None:
+        # Called with the lock held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="display-worker", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                method, args, kwargs = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                if self.display is None:
+                    with span("display.init"):
+                        self.display = self.factory()
+                func = getattr(self.display, method, None)
+                if func is None:
+                    continue
+                with frame_render_seconds.time(call=method), span(f"display.{method}"):
+                    func(*args, **kwargs)
+                self.rendered_frames += 1
+            except Exception as e:
+                logger.error(f"Got error while updating display: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
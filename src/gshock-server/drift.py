@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from gshock_api.gshock_api import GshockAPI
+from gshock_api.logger import logger
+from sync_history import SyncHistory
+
+# Casio's usual quartz spec, +/-15 seconds a month
+SPEC_PPM = 15 / (30 * 86400) * 1e6
+
+
+async def read_clock_error(api: GshockAPI, clock_offset: float = 0.0, timeout: float = 2.0) -> Optional[float]:
+    """
+    Watch time minus reference time, in seconds, read just before the time is set.
+
+    Needs an API that can read the watch's current time: an async get_time()
+    returning a local datetime or a POSIX timestamp. gshock_api does not have one
+    yet, so this returns None, as it does when the read fails, and the rest of
+    the sync is unaffected.
+    """
+    get_time = getattr(api, "get_time", None)
+    if get_time is None:
+        return None
+    try:
+        watch_time = await asyncio.wait_for(get_time(), timeout)
+    except Exception as e:
+        logger.debug(f"Could not read the watch time: {e}")
+        return None
+    if isinstance(watch_time, datetime):
+        watch_time = watch_time.timestamp()
+    if watch_time is None:
+        return None
+    return watch_time - (time.time() + clock_offset)
+
+
+@dataclass
+class DriftEstimate:
+    address: str
+    name: str
+    samples: int
+    drift_ppm: Optional[float]
+    last_error: Optional[float]
+    max_abs_error: Optional[float]
+
+    @property
+    def out_of_spec(self) -> bool:
+        return self.drift_ppm is not None and abs(self.drift_ppm) > SPEC_PPM
+
+    def sync_interval(self, tolerance: float) -> Optional[float]:
+        """Seconds between syncs that keep the watch within tolerance seconds of the reference."""
+        if not self.drift_ppm:
+            return None
+        return tolerance / (abs(self.drift_ppm) * 1e-6)
+
+
+def estimate_drift(history: SyncHistory, address: str, name: str = "", days: int = 90) -> DriftEstimate:
+    """
+    Fit the drift rate of one watch from its sync history.
+
+    Each sync sets the watch to a known offset from the reference (the fine
+    adjustment, and the second truncation or latency compensation), so the error
+    found before the next sync, minus that offset, is what the watch gained or
+    lost in the time between them. The drift is the least-squares slope of those
+    changes over the elapsed times, through the origin.
+    """
+    syncs = history.sync_errors(address, since=time.time() - days * 86400)
+    errors = []
+    for (previous, _, set_offset), (timestamp, error, _) in zip(syncs, syncs[1:]):
+        if error is not None and timestamp > previous:
+            errors.append((timestamp - previous, error - set_offset))
+
+    drift_ppm = None
+    if errors:
+        sum_xx = sum(dt * dt for dt, _ in errors)
+        drift_ppm = sum(dt * e for dt, e in errors) / sum_xx * 1e6
+    measured = [e for _, e, _ in syncs if e is not None]
+    return DriftEstimate(
+        address=address,
+        name=name,
+        samples=len(errors),
+        drift_ppm=drift_ppm,
+        last_error=measured[-1] if measured else None,
+        max_abs_error=max((abs(e) for e in measured), default=None),
+    )
+
+
+def drift_report(history: SyncHistory, days: int = 90) -> List[DriftEstimate]:
+    """Drift estimates for every watch in the history, worst first."""
+    estimates = [estimate_drift(history, address, name, days) for address, name, _ in history.watches()]
+    return sorted(estimates, key=lambda e: -abs(e.drift_ppm) if e.drift_ppm is not None else 0.0)
+
+
+def _format_interval(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds >= 2 * 86400:
+        return f"{seconds / 86400:.0f} d"
+    return f"{seconds / 3600:.1f} h"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-watch drift and accuracy report from the sync history")
+    parser.add_argument("--db", default="gshock_sync_history.db", help="Sync history database")
+    parser.add_argument("--days", type=int, default=90, help="How much history to fit")
+    parser.add_argument("--tolerance-secs", type=float, default=0.5,
+                        help="Accuracy to keep watches within, for the suggested sync interval")
+    opts = parser.parse_args()
+
+    history = SyncHistory(opts.db)
+    estimates = drift_report(history, opts.days)
+    if not estimates:
+        print("No syncs recorded yet.")
+        return
+
+    print(f"{'watch':<24} {'address':<18} {'n':>4} {'ppm':>8} {'s/month':>8} {'last err':>9} {'sync every':>11}")
+    for e in estimates:
+        if e.drift_ppm is None:
+            print(f"{e.name:<24} {e.address:<18} {e.samples:>4} {'-':>8} {'-':>8} {'-':>9} {'-':>11}")
+            continue
+        flag = "  OUT OF SPEC" if e.out_of_spec else ""
+        last = f"{e.last_error:+.1f}s" if e.last_error is not None else "-"
+        print(
+            f"{e.name:<24} {e.address:<18} {e.samples:>4} {e.drift_ppm:>+8.2f} "
+            f"{e.drift_ppm * 1e-6 * 30 * 86400:>+8.1f} {last:>9} "
+            f"{_format_interval(e.sync_interval(opts.tolerance_secs)):>11}{flag}"
+        )
+
+
+if __name__ == "__main__":
+    main()
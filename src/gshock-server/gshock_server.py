@@ -1,16 +1,20 @@
 import asyncio
 import sys
 import time
-from datetime import datetime, timedelta
 from typing import List, Tuple
 
-from gshock_api.connection import Connection
-from gshock_api.gshock_api import GshockAPI
-from gshock_api.iolib.button_pressed_io import WatchButton
 from gshock_api.logger import logger
-from gshock_api.watch_info import watch_info
 from args import args
-from persistent_store import PersistentMap
+from check_bt import AdapterMonitor
+from metrics import start_exporters
+from persistent_store import JournalBackend, PersistentMap
+from scan_schedule import ScanSchedule
+from session_scheduler import SessionScheduler
+from sync_history import SyncHistory
+from tracing import tracer
+from utils import stop_on_signals
+from time_source import time_source
+from time_server_flow import TimeServerFlow
 from gshock_api.always_connected_watch_filter import always_connected_watch_filter as watch_filter
 
 
@@ -23,6 +27,14 @@ async def main(argv: List[str]) -> None:
     await run_time_server()
 
 
+store = PersistentMap(
+    "gshock_server_data.json",
+    write_behind=True,
+    backend=JournalBackend("gshock_server_data.json"),
+)
+history = SyncHistory("gshock_sync_history.db")
+
+
 def prompt() -> None:
     logger.info(
         "=============================================================================================="
@@ -38,55 +50,30 @@ def prompt() -> None:
     logger.info("")
 
 
-
+flow = TimeServerFlow(store, history)
 
 
 async def run_time_server() -> None:
-    store = PersistentMap("gshock_server_data.json")
     prompt()
-
-    while True:
-        try:
-            # avoid tight loops
-            await asyncio.sleep(1)
-
-            logger.info("Waiting for Connection...")
-
-            connection = Connection()
-            connected = await connection.connect(
-                lambda name: name not in ["CASIO OCW-T200"] and watch_filter.connection_filter(name)
-            )
-
-            if not connected:
-                logger.info("Failed to connect")
-                continue
-
-            logger.info(f"Connected to {watch_info.name} ({watch_info.address})")
-            store.add("last_connected", datetime.now().strftime("%m/%d %H:%M"))
-            store.add("watch_name", watch_info.name)
-
-            api = GshockAPI(connection)
-            pressed_button = await api.get_pressed_button()
-            if (
-                pressed_button != WatchButton.LOWER_RIGHT
-                and pressed_button != WatchButton.NO_BUTTON
-                and pressed_button != WatchButton.LOWER_LEFT
-            ):
-                continue
-
-            # Apply fine adjustment to the time
-            fine_adjustment_secs = args.fine_adjustment_secs
-
-            await api.set_time(offset=int(fine_adjustment_secs))
-
-            logger.info(f"Time set at {datetime.now()} on {watch_info.name}")
-
-            if not watch_info.alwaysConnected:
-                await connection.disconnect()
-
-        except Exception as e:
-            logger.error(f"Got error: {e}")
-            continue
+    tracer.configure(args.trace, args.trace_format)
+    time_source.configure(args.time_reference, args.max_clock_error_ms / 1000)
+    time_source.start()
+    await start_exporters(args.metrics_port, args.metrics_file)
+
+    scheduler = SessionScheduler(
+        flow,
+        watch_filter=lambda name: name not in ["CASIO OCW-T200"] and watch_filter.connection_filter(name),
+        max_sessions=args.max_sessions,
+        session_timeout=args.session_timeout,
+        scan_schedule=ScanSchedule(history) if args.adaptive_scan else None,
+        adapter_monitor=AdapterMonitor(),
+    )
+    task = asyncio.create_task(scheduler.run())
+    stop_on_signals(task, store.flush, tracer.flush)
+    try:
+        await task
+    except asyncio.CancelledError:
+        logger.info("Server stopped")
 
 
 if __name__ == "__main__":
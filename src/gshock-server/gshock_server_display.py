@@ -4,14 +4,23 @@ import time
 from datetime import datetime, timedelta
 from typing import List, Tuple
 
-from gshock_api.connection import Connection
 from gshock_api.gshock_api import GshockAPI
 from gshock_api.iolib.button_pressed_io import WatchButton
 from gshock_api.logger import logger
 from args import args
+from check_bt import AdapterMonitor
+from metrics import start_exporters
 from gshock_api.watch_info import watch_info
-from utils import run_once_key
-from persistent_store import PersistentMap
+from utils import run_once_key, stop_on_signals
+from display_worker import DisplayWorker
+from persistent_store import JournalBackend, PersistentMap
+from scan_schedule import ScanSchedule
+from session_scheduler import SessionScheduler, SessionState, WatchSession
+from sync_history import SyncHistory
+from tracing import span, tracer
+from time_source import time_source
+from time_server_flow import TimeServerFlow
+from watch_cache import WatchDataCache
 from gshock_api.always_connected_watch_filter import always_connected_watch_filter as watch_filter
 
 
@@ -24,7 +33,17 @@ async def main(argv: List[str]) -> None:
     await run_time_server()
 
 
-store = PersistentMap("gshock_server_data.json")
+store = PersistentMap(
+    "gshock_server_data.json",
+    write_behind=True,
+    backend=JournalBackend("gshock_server_data.json"),
+)
+history = SyncHistory("gshock_sync_history.db")
+watch_cache = WatchDataCache(PersistentMap(
+    "gshock_watch_cache.json",
+    write_behind=True,
+    backend=JournalBackend("gshock_watch_cache.json"),
+))
 
 
 def prompt() -> None:
@@ -56,7 +75,15 @@ def get_display(display_type: str) -> object:
         raise ValueError(f"Unsupported display type: {display_type}")
 
 
-oled = get_display(args.display)
+# Rendering and SPI transfers run on their own thread, off the BLE event loop.
+# The display itself is built there too, when the first frame is shown.
+oled = DisplayWorker(factory=lambda: get_display(args.display))
+
+
+READ_TIMEOUT_SECS = 5.0
+STATUS_READS = ["alarms", "reminder", "condition", "auto_sync"]
+CACHED_READS = ["alarms", "reminder", "auto_sync"]
+TICK_INTERVAL_SECS = 60
 
 
 def get_next_alarm_time(alarms: List[dict[str, int]]) -> Tuple[int, int] | None:
@@ -89,118 +116,190 @@ def get_next_alarm_time(alarms: List[dict[str, int]]) -> Tuple[int, int] | None:
     return next_alarm.hour, next_alarm.minute
 
 
-async def show_display(api: GshockAPI) -> None:
-    try:
-        alarms = await api.get_alarms()
-        hour, minute = get_next_alarm_time(alarms)
-        if hour is not None and minute is not None:
+async def fetch_watch_state(api: GshockAPI, keys: List[str]) -> dict:
+    """
+    Issue the reads needed by the status screen together instead of one after another.
+    Each read has its own timeout; a read that fails is logged and left out of the result.
+    """
+    all_reads = {
+        "alarms": api.get_alarms,
+        # Only the first reminder is shown, so don't fetch all five
+        "reminder": lambda: api.get_event_from_watch(1),
+        "condition": api.get_watch_condition,
+        "auto_sync": api.get_time_adjustment,
+    }
+    reads = {key: all_reads[key] for key in keys}
+    results = await asyncio.gather(
+        *(asyncio.wait_for(read(), timeout=READ_TIMEOUT_SECS) for read in reads.values()),
+        return_exceptions=True,
+    )
+
+    state = {}
+    for key, result in zip(reads, results):
+        if isinstance(result, Exception):
+            logger.error(f"Got error reading {key}: {result!r}")
+        else:
+            state[key] = result
+    return state
+
+
+def render_status(state: dict, last_sync: datetime) -> None:
+    alarm_str = "--"
+    if "alarms" in state:
+        next_alarm = get_next_alarm_time(state["alarms"])
+        if next_alarm is not None:
+            hour, minute = next_alarm
             alarm_str = f"{hour:02d}:{minute:02d}"
         else:
             alarm_str = "Invalid time"
 
-        reminders = await api.get_reminders()
-        reminder_title = reminders[0].get("title") if reminders else "None"
-        condition = await api.get_watch_condition()
-        battery = condition.get("battery_level_percent")
-        temperature = condition.get("temperature")
-        name = watch_info.name
-        short_name = ' '.join(name.strip().split()[1:])
-
-        oled.show_status(
-            watch_name=short_name,
-            battery=battery,
-            temperature=temperature,
-            last_sync=datetime.now().strftime("%m/%d %H:%M"),
-            alarm=alarm_str,
-            reminder=reminder_title,
-            auto_sync="On" if await api.get_time_adjustment() else "Off",
-        )
-    except Exception as e:
-        logger.error(f"Got error: {e}")
+    reminder = state.get("reminder")
+    reminder_title = (reminder.get("title") if reminder else None) or "None"
+    if "reminder" not in state:
+        reminder_title = "--"
+
+    condition = state.get("condition")
+    battery = condition.get("battery_level_percent") if condition else None
+    temperature = condition.get("temperature") if condition else "--"
+
+    auto_sync = "--"
+    if "auto_sync" in state:
+        auto_sync = "On" if state["auto_sync"] else "Off"
+
+    name = watch_info.name
+    short_name = ' '.join(name.strip().split()[1:])
+
+    oled.show_status(
+        watch_name=short_name,
+        battery=battery,
+        temperature=temperature,
+        last_sync=last_sync,
+        alarm=alarm_str,
+        reminder=reminder_title,
+        auto_sync=auto_sync,
+    )
 
 
-async def safe_set_time(api: GshockAPI, offset: int = 0) -> None:
+async def show_display(api: GshockAPI) -> dict | None:
     try:
-        await api.set_time(offset=offset)
+        address = watch_info.address
+        watch_cache.check_watch(address, watch_info.name)
+
+        # Draw from cache right away, then read only what is too old to show.
+        # Merely stale values are left to refresh_cache() on an auto-sync connection.
+        synced_at = datetime.now()
+        cached = watch_cache.values(address)
+        if cached:
+            render_status(cached, synced_at)
+
+        expired = watch_cache.expired_keys(address, STATUS_READS)
+        fresh = await fetch_watch_state(api, expired)
+        watch_cache.update(address, fresh)
+
+        render_status({**cached, **fresh}, synced_at)
+        return fresh.get("condition")
     except Exception as e:
-        logger.error(f"Got error while setting time: {e}")
+        logger.error(f"Got error: {e}")
+        return None
 
 
-async def safe_show_display(api: GshockAPI) -> None:
+async def refresh_cache(api: GshockAPI) -> None:
+    """Re-read the cached values past their TTL, while nothing is waiting on the screen."""
+    address = watch_info.address
+    watch_cache.check_watch(address, watch_info.name)
+    stale = watch_cache.stale_keys(address, CACHED_READS)
+    if stale:
+        watch_cache.update(address, await fetch_watch_state(api, stale))
+
+
+async def safe_show_display(api: GshockAPI) -> dict | None:
     try:
-        await show_display(api)
+        return await show_display(api)
     except Exception as e:
         logger.error(f"Got error while showing display: {e}")
+        return None
 
 
-async def run_time_server() -> None:
-    pressed_button: WatchButton = WatchButton.NO_BUTTON
-
-    prompt()
-
-    while True:
-        connection: Connection | None = None
-
-        await asyncio.sleep(1)
-
-        try:
-            run_once_key(
-                "show_welcome_screen",
-                oled.show_welcome_screen,
-                "Waiting\nfor connection...",
-                watch_name=store.get("watch_name", None),
-                last_sync=store.get("last_connected", None),
-            )
+def show_waiting_screen() -> None:
+    oled.show_welcome_screen(
+        "Waiting\nfor connection...",
+        watch_name=store.get("watch_name", None),
+        last_sync=store.get("last_connected", None),
+    )
 
-            logger.info("Waiting for Connection...")
 
-            connection = Connection(address=None)
-            connected = await connection.connect(watch_filter.connection_filter)
-            if not connected:
-                logger.info("Failed to connect")
-                continue
+class DisplayServerFlow(TimeServerFlow):
+    """Sets the time, then shows the watch's status (LOWER-LEFT) or the waiting screen."""
+
+    async def read_button(self, session: WatchSession, api: GshockAPI) -> WatchButton:
+        watch_cache.track_writes(api, session.address)
+        return await super().read_button(session, api)
+
+    async def display(self, session: WatchSession, api: GshockAPI) -> None:
+        # Only the status reads need the watch. Frames are drawn on the display
+        # thread, so they overlap with the disconnect that follows.
+        if session.synced and session.button == WatchButton.LOWER_LEFT:
+            with span("show_display"):
+                session.data["condition"] = await safe_show_display(api)
+            return
+        show_waiting_screen()
+        # The watch connected by itself and nobody is looking: refresh stale values
+        # now, so the next LOWER-LEFT press can draw from cache without reading them
+        if session.synced and session.button == WatchButton.NO_BUTTON:
+            with span("refresh_cache"):
+                try:
+                    await refresh_cache(api)
+                except Exception as e:
+                    logger.error(f"Got error refreshing the watch cache: {e}")
 
-            oled.show_welcome_screen(message="Connected!")
 
-            store.add("last_connected", datetime.now().strftime("%m/%d %H:%M"))
-            store.add("watch_name", watch_info.name)
+flow = DisplayServerFlow(store, history)
 
-            api = GshockAPI(connection)
-            pressed_button = await api.get_pressed_button()
 
-            if pressed_button not in [WatchButton.LOWER_RIGHT, WatchButton.NO_BUTTON, WatchButton.LOWER_LEFT]:
-                continue
+def show_session_state(session: WatchSession, old: SessionState, new: SessionState, seconds: float) -> None:
+    if new is SessionState.CONNECTED:
+        oled.show_welcome_screen(message="Connected!")
+    elif new is SessionState.FAILED:
+        show_waiting_screen()
 
-            fine_adjustment_secs = args.fine_adjustment_secs
-            await safe_set_time(api, offset=int(fine_adjustment_secs))
 
-            logger.info(f"Time set at {datetime.now()} on {watch_info.name}")
+async def tick_display() -> None:
+    # Keeps "HH:MM since sync" current between connections, without BLE traffic
+    while True:
+        await asyncio.sleep(TICK_INTERVAL_SECS)
+        oled.tick()
 
-            if pressed_button == WatchButton.LOWER_LEFT:
-                await safe_show_display(api)
-            elif pressed_button in [WatchButton.LOWER_RIGHT, WatchButton.NO_BUTTON]:
-                oled.show_welcome_screen(
-                    "Waiting\nfor connection...",
-                    watch_name=store.get("watch_name", None),
-                    last_sync=store.get("last_connected", None),
-                )
 
-            if not watch_info.alwaysConnected:
-                try:
-                    await connection.disconnect()
-                except Exception as e:
-                    logger.error(f"Got error while disconnecting: {e}")
-
-        except Exception as e:
-            logger.error(f"Got error: {e}")
-
-            oled.show_welcome_screen(
-                "Waiting\nfor connection...",
-                watch_name=store.get("watch_name", None),
-                last_sync=store.get("last_connected", None),
-            )
-        finally:
-            pass
+async def run_time_server() -> None:
+    prompt()
+    tracer.configure(args.trace, args.trace_format)
+    time_source.configure(args.time_reference, args.max_clock_error_ms / 1000)
+    time_source.start()
+    await start_exporters(args.metrics_port, args.metrics_file)
+    max_age = args.cache_max_age_hours * 3600
+    watch_cache.max_age.update(alarms=max_age, reminder=max_age)
+
+    ticker = asyncio.create_task(tick_display())
+
+    run_once_key("show_welcome_screen", show_waiting_screen)
+
+    scheduler = SessionScheduler(
+        flow,
+        watch_filter=watch_filter.connection_filter,
+        max_sessions=args.max_sessions,
+        session_timeout=args.session_timeout,
+        scan_schedule=ScanSchedule(history) if args.adaptive_scan else None,
+        adapter_monitor=AdapterMonitor(),
+    )
+    scheduler.subscribe(show_session_state)
+    task = asyncio.create_task(scheduler.run())
+    stop_on_signals(task, store.flush, watch_cache.store.flush, tracer.flush)
+    try:
+        await task
+    except asyncio.CancelledError:
+        logger.info("Server stopped")
+    finally:
+        ticker.cancel()
 
 
 if __name__ == "__main__":
@@ -1,43 +1,258 @@
+import asyncio
+import atexit
+import copy
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+def _atomic_write(filepath, text):
+    """
+    Replace a file so that readers see either the old or the new content, never a torn one.
+    """
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+
+class JsonFileBackend:
+    """
+    Stores the whole map as one JSON document, rewritten atomically on every save.
+    """
 
-class PersistentMap:
     def __init__(self, filepath):
+        self.filepath = filepath
+
+    def load(self):
+        if not os.path.isfile(self.filepath):
+            return {}
+        with open(self.filepath, 'r') as f:
+            return json.load(f)
+
+    def save(self, data, changes):
+        _atomic_write(self.filepath, json.dumps(data, indent=2))
+
+
+class JournalBackend:
+    """
+    Stores a JSON snapshot plus an append-only journal of mutations next to it.
+
+    A save appends one line per change, so its cost does not grow with the map.
+    Every compact_every entries the journal is folded into a new snapshot, which
+    is written to a temporary file and renamed into place. Replaying a change is
+    idempotent, so a crash between the rename and the journal reset is harmless,
+    and a torn last journal line is simply dropped.
+    """
+
+    def __init__(self, filepath, compact_every=100):
+        self.filepath = filepath
+        self.journal_path = f"{filepath}.journal"
+        self.compact_every = compact_every
+        self._entries = 0
+
+    def load(self):
+        data = {}
+        if os.path.isfile(self.filepath):
+            with open(self.filepath, 'r') as f:
+                data = json.load(f)
+
+        self._entries = 0
+        torn = False
+        if os.path.isfile(self.journal_path):
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        op, key, value = json.loads(line)
+                    except (json.JSONDecodeError, ValueError, TypeError):
+                        print(f"⚠️ Ignoring torn journal entry in {self.journal_path}")
+                        torn = True
+                        break
+                    self._apply(data, op, key, value)
+                    self._entries += 1
+
+        if torn:
+            # Start a clean journal, otherwise new entries would be appended to the torn line.
+            self.compact(data)
+        return data
+
+    def save(self, data, changes):
+        if self._entries + len(changes) >= self.compact_every:
+            self.compact(data)
+            return
+
+        with open(self.journal_path, 'a') as f:
+            for change in changes:
+                f.write(json.dumps(change) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._entries += len(changes)
+
+    def compact(self, data):
+        _atomic_write(self.filepath, json.dumps(data, indent=2))
+        with open(self.journal_path, 'w') as f:
+            os.fsync(f.fileno())
+        self._entries = 0
+
+    @staticmethod
+    def _apply(data, op, key, value):
+        if op == "set":
+            data[key] = value
+        elif op == "delete":
+            data.pop(key, None)
+        elif op == "clear":
+            data.clear()
+
+
+class PersistentMap:
+    def __init__(self, filepath, write_behind=False, flush_delay=1.0, backend=None):
         """
         Initialize the map and optionally load existing data from disk.
+
+        The storage format is pluggable through backend; by default the map is
+        kept in a single JSON file. With write_behind, changes only mark the map
+        dirty. They are written together flush_delay seconds later, on a worker
+        thread when an event loop is running, and on explicit flush() or
+        interpreter exit.
+
+        Nothing is read, and no writer thread is started, until the map is first
+        used, so a module can create its maps at import time for free.
         """
         self.filepath = filepath
-        self.data = {}
-        self._load()
+        self.backend = backend or JsonFileBackend(filepath)
+        self.write_behind = write_behind
+        self.flush_delay = flush_delay
+
+        self._data = None
+        self._changes = []
+        self._batch_depth = 0
+        self._flush_handle = None
+        self._writer = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._load()
+        return self._data
 
     def _load(self):
         """
         Load the data from disk if the file exists.
         """
         try:
-            if os.path.isfile(self.filepath):
-                with open(self.filepath, 'r') as f:
-                    self.data = json.load(f)
+            self._data = self.backend.load()
         except (json.JSONDecodeError, OSError) as e:
             print(f"⚠️ Failed to load map from {self.filepath}: {e}")
-            self.data = {}
+            self._data = {}
+
+        if self.write_behind:
+            # A single worker keeps background saves in order, which the journal relies on.
+            self._writer = ThreadPoolExecutor(max_workers=1)
+            atexit.register(self.flush)
 
-    def _save(self):
+    def _save(self, data, changes):
         """
-        Save the current data to disk.
+        Save a snapshot of the data to disk.
         """
         try:
-            with open(self.filepath, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            self.backend.save(data, changes)
         except OSError as e:
             print(f"❌ Failed to save map to {self.filepath}: {e}")
 
+    def _snapshot(self):
+        """
+        Take a copy of the data and the pending changes, and clear the dirty state.
+        """
+        changes, self._changes = self._changes, []
+        return copy.deepcopy(self.data), changes
+
+    @property
+    def dirty(self):
+        return bool(self._changes)
+
+    def _changed(self, op, key=None, value=None):
+        """
+        Record a mutation and save it now or later, depending on the mode.
+        """
+        self._changes.append((op, key, copy.deepcopy(value)))
+        if self._batch_depth:
+            return
+        if self.write_behind:
+            self._schedule_flush()
+        else:
+            self.flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to defer to - nothing would ever flush, so write now.
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self._flush_in_background, loop)
+
+    def _flush_in_background(self, loop):
+        self._flush_handle = None
+        if self.dirty:
+            loop.run_in_executor(self._writer, self._save, *self._snapshot())
+
+    def flush(self):
+        """
+        Write pending changes to disk now.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self.dirty:
+            return
+
+        snapshot = self._snapshot()
+        if self._writer is None:
+            self._save(*snapshot)
+            return
+        try:
+            # Queue behind any background save that is still running.
+            self._writer.submit(self._save, *snapshot).result()
+        except RuntimeError:
+            # The executor is already shut down (interpreter exit) and has drained its queue.
+            self._save(*snapshot)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group several mutations into a single write.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self.dirty:
+                if self.write_behind:
+                    self._schedule_flush()
+                else:
+                    self.flush()
+
+    def __enter__(self):
+        self._batch_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.flush()
+
     def add(self, key, value):
         """
         Add or update a key-value pair.
         """
         self.data[key] = value
-        self._save()
+        self._changed("set", key, value)
 
     def delete(self, key):
         """
@@ -45,14 +260,14 @@ class PersistentMap:
         """
         if key in self.data:
             del self.data[key]
-            self._save()
+            self._changed("delete", key)
 
     def clear(self):
         """
         Clear all key-value pairs.
         """
         self.data.clear()
-        self._save()
+        self._changed("clear")
 
     def get(self, key, default=None):
         """
@@ -0,0 +1,136 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Optional
+
+from gshock_api.exceptions import GShockConnectionError
+from gshock_api.logger import logger
+
+
+class FailureKind(Enum):
+    ADAPTER_DOWN = "adapter down"
+    SCAN_TIMEOUT = "scan timeout"
+    GATT_ERROR = "GATT error"
+    PROTOCOL_ERROR = "protocol error"
+
+
+_ADAPTER_HINTS = (
+    "not powered",
+    "no bluetooth adapters",
+    "org.bluez.error.notready",
+    "org.bluez.error.inprogress",
+    "adapter",
+    "org.freedesktop.dbus.error.serviceunknown",
+)
+
+
+def classify(error: BaseException, stage: str) -> FailureKind:
+    """
+    Map an exception to a failure class. stage is where it happened: "scan", "connect" or "session".
+    """
+    message = str(error).lower()
+    # Checked first: asyncio.TimeoutError is an OSError on Python 3.11+
+    if isinstance(error, asyncio.TimeoutError):
+        return FailureKind.SCAN_TIMEOUT if stage == "scan" else FailureKind.PROTOCOL_ERROR
+    # Also before OSError, of which ConnectionError is a subclass: a dropped link is not
+    # the adapter. While scanning there is no link, so there it means BlueZ went away.
+    if stage != "scan" and isinstance(error, (EOFError, ConnectionError)):
+        return FailureKind.GATT_ERROR
+    if isinstance(error, OSError) or any(hint in message for hint in _ADAPTER_HINTS):
+        return FailureKind.ADAPTER_DOWN
+    if stage == "scan":
+        # The scanner only talks to the adapter; anything else going wrong there is the adapter too
+        return FailureKind.ADAPTER_DOWN
+    if stage == "connect":
+        return FailureKind.GATT_ERROR
+    if isinstance(error, GShockConnectionError) and "timeout" not in message:
+        return FailureKind.GATT_ERROR
+    if type(error).__module__.startswith("bleak"):
+        return FailureKind.GATT_ERROR
+    # Response timeouts, session timeouts and malformed replies
+    return FailureKind.PROTOCOL_ERROR
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter: base * factor^(n-1), randomized by +/- jitter, capped at max_delay."""
+    base_delay: float
+    max_delay: float
+    factor: float = 2.0
+    jitter: float = 0.25
+
+    def delay(self, attempt: int) -> float:
+        if attempt <= 0 or self.base_delay <= 0:
+            return 0.0
+        delay = self.base_delay * self.factor ** (attempt - 1)
+        return min(self.max_delay, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+DEFAULT_POLICIES: Dict[FailureKind, RetryPolicy] = {
+    FailureKind.ADAPTER_DOWN: RetryPolicy(base_delay=2.0, max_delay=300.0),
+    FailureKind.SCAN_TIMEOUT: RetryPolicy(base_delay=1.0, max_delay=30.0),
+    # Per watch: keep a misbehaving watch from monopolizing the scanner
+    FailureKind.GATT_ERROR: RetryPolicy(base_delay=2.0, max_delay=120.0),
+    FailureKind.PROTOCOL_ERROR: RetryPolicy(base_delay=5.0, max_delay=300.0),
+}
+
+
+class Backoff:
+    """
+    Counts consecutive failures per key (failure class, or watch address) and
+    returns how long to wait before the next attempt.
+    """
+
+    def __init__(self, policies: Optional[Dict[FailureKind, RetryPolicy]] = None):
+        self.policies = dict(DEFAULT_POLICIES)
+        self.policies.update(policies or {})
+        self.failures: Dict[object, int] = {}
+
+    def failure(self, key: object, kind: FailureKind) -> float:
+        attempt = self.failures.get(key, 0) + 1
+        self.failures[key] = attempt
+        return self.policies[kind].delay(attempt)
+
+    def success(self, key: object) -> None:
+        self.failures.pop(key, None)
+
+    def attempts(self, key: object) -> int:
+        return self.failures.get(key, 0)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive adapter failures. While open, the next
+    attempt first runs the (expensive) adapter recovery, instead of doing so
+    on every error. A success closes the breaker again.
+    """
+
+    def __init__(self, recover: Callable[[], Awaitable[bool]], threshold: int = 3, cooldown: float = 60.0):
+        self.recover = recover
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self._last_recovery: Optional[float] = None
+
+    @property
+    def open(self) -> bool:
+        return self.failures >= self.threshold
+
+    def failure(self) -> None:
+        self.failures += 1
+
+    def success(self) -> None:
+        self.failures = 0
+
+    async def before_attempt(self) -> None:
+        if not self.open:
+            return
+        now = time.monotonic()
+        if self._last_recovery is not None and now - self._last_recovery < self.cooldown:
+            return
+        self._last_recovery = now
+        logger.warning(f"Bluetooth adapter failed {self.failures} times in a row, trying to recover it")
+        ready = await self.recover()
+        logger.info("Bluetooth adapter is ready" if ready else "Bluetooth adapter is still not ready")
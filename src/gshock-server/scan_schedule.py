@@ -0,0 +1,104 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from gshock_api.logger import logger
+from sync_history import SyncHistory
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def minute_of_day(timestamp: float) -> int:
+    t = datetime.fromtimestamp(timestamp)
+    return t.hour * 60 + t.minute
+
+
+def minutes_apart(a: int, b: int) -> int:
+    """Distance between two times of day, wrapping around midnight."""
+    d = abs(a - b) % MINUTES_PER_DAY
+    return min(d, MINUTES_PER_DAY - d)
+
+
+class ScanSchedule:
+    """
+    Decides how hard to scan, from when watches have auto-synced before.
+
+    Watches with auto time adjustment connect at the same times every day. Around
+    those times (a watch has connected within window_minutes of the current time
+    of day on at least min_days past occasions) scanning is continuous, with the
+    scheduler's full scan timeout. Otherwise the scanner listens for idle_scan_secs
+    and then pauses idle_secs, a duty cycle of idle_scan_secs / (idle_scan_secs +
+    idle_secs), 25% with the defaults. A button-press connection is still picked
+    up, since the watch keeps advertising for longer than one such period.
+
+    With no history to learn from, scanning stays continuous.
+    """
+
+    def __init__(
+        self,
+        history: SyncHistory,
+        window_minutes: int = 10,
+        lookback_days: int = 14,
+        min_days: int = 2,
+        idle_scan_secs: float = 2.0,
+        idle_secs: float = 6.0,
+        refresh_secs: float = 3600.0,
+    ):
+        self.history = history
+        self.window_minutes = window_minutes
+        self.lookback_days = lookback_days
+        self.min_days = min_days
+        self.idle_scan_secs = idle_scan_secs
+        self.idle_secs = idle_secs
+        self.refresh_secs = refresh_secs
+
+        self._auto_sync_minutes: Dict[str, List[int]] = {}
+        self._refreshed_at: Optional[float] = None
+        self._was_active: Optional[bool] = None
+
+    def _refresh(self) -> None:
+        now = time.time()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_secs:
+            return
+        self._refreshed_at = now
+
+        # NO_BUTTON sessions are the watch's own scheduled syncs; button presses are not predictable
+        minutes = defaultdict(list)
+        for address, timestamp in self.history.sync_times(now - self.lookback_days * 86400, button="NO_BUTTON"):
+            minutes[address].append(minute_of_day(timestamp))
+        self._auto_sync_minutes = dict(minutes)
+
+    def in_predicted_window(self, now: Optional[float] = None) -> bool:
+        self._refresh()
+        current = minute_of_day(now if now is not None else time.time())
+        for minutes in self._auto_sync_minutes.values():
+            hits = sum(1 for m in minutes if minutes_apart(m, current) <= self.window_minutes)
+            if hits >= self.min_days:
+                return True
+        return False
+
+    @property
+    def duty_cycle(self) -> float:
+        """Fraction of the time spent scanning outside the predicted windows."""
+        return self.idle_scan_secs / (self.idle_scan_secs + self.idle_secs)
+
+    def _active(self) -> bool:
+        self._refresh()
+        if not self._auto_sync_minutes:
+            return True
+
+        active = self.in_predicted_window()
+        if active != self._was_active:
+            logger.info("Predicted auto-sync window: scanning continuously" if active
+                        else f"Outside auto-sync windows: scanning {self.duty_cycle:.0%} of the time")
+            self._was_active = active
+        return active
+
+    def scan_secs(self, default: float) -> float:
+        """How long the next scan should listen; default is the scheduler's own scan timeout."""
+        return default if self._active() else min(default, self.idle_scan_secs)
+
+    def pause_after_empty_scan(self) -> float:
+        """Seconds to wait before scanning again when the last scan found nothing."""
+        return 0.0 if self._active() else self.idle_secs
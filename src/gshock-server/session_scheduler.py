@@ -0,0 +1,385 @@
+import asyncio
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from bleak import BleakScanner, BLEDevice
+from check_bt import AdapterMonitor, AdapterState, ensure_bt_ready
+from gshock_api.connection import Connection
+from gshock_api.gshock_api import GshockAPI
+from gshock_api.iolib.button_pressed_io import WatchButton
+from gshock_api.logger import logger
+from gshock_api.watch_info import watch_info
+from metrics import active_sessions, connect_seconds, failures_total, session_state_seconds, syncs_total
+from retry_policy import Backoff, CircuitBreaker, FailureKind, classify
+from scan_schedule import ScanSchedule
+from tracing import current_session, span, tracer
+
+CASIO_SERVICE_UUID = "00001804-0000-1000-8000-00805f9b34fb"
+
+
+class SessionState(Enum):
+    SCANNING = "scanning"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    BUTTON_READ = "button_read"
+    SYNCING = "syncing"
+    DISPLAY = "display"
+    DISCONNECTING = "disconnecting"
+    DONE = "done"
+    FAILED = "failed"
+
+
+# Every live state can also cut straight to DISCONNECTING, on an error or when there is nothing more to do
+TRANSITIONS = {
+    SessionState.SCANNING: {SessionState.CONNECTING, SessionState.DISCONNECTING},
+    SessionState.CONNECTING: {SessionState.CONNECTED, SessionState.DISCONNECTING},
+    SessionState.CONNECTED: {SessionState.BUTTON_READ, SessionState.DISCONNECTING},
+    SessionState.BUTTON_READ: {SessionState.SYNCING, SessionState.DISCONNECTING},
+    SessionState.SYNCING: {SessionState.DISPLAY, SessionState.DISCONNECTING},
+    SessionState.DISPLAY: {SessionState.DISCONNECTING},
+    SessionState.DISCONNECTING: {SessionState.DONE, SessionState.FAILED},
+    SessionState.DONE: set(),
+    SessionState.FAILED: set(),
+}
+
+# listener(session, old, new, seconds spent in old)
+TransitionListener = Callable[["WatchSession", SessionState, SessionState, float], None]
+
+
+class WatchSession:
+    """
+    State for one watch, from the scan that found it to the disconnect.
+    """
+
+    def __init__(self, address: str, name: str, scan_started: Optional[float] = None,
+                 listeners: Optional[List[TransitionListener]] = None):
+        self.address = address
+        self.name = name
+        self.model = ""
+        self.started = time.monotonic()
+        self.connection: Optional[Connection] = None
+        self.always_connected = False
+
+        self.state = SessionState.SCANNING
+        self.timings: Dict[SessionState, float] = {}
+        self.button: Optional[WatchButton] = None
+        # None until a sync is attempted, False if the flow decided not to set the time
+        self.synced: Optional[bool] = None
+        # Whatever else the flow wants to carry from one step to the next
+        self.data: Dict[str, Any] = {}
+
+        self._entered = scan_started if scan_started is not None else self.started
+        self._listeners = listeners or []
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def enter(self, state: SessionState) -> None:
+        """Move to state, recording how long the previous one took."""
+        old = self.state
+        if state not in TRANSITIONS[old]:
+            raise ValueError(f"{self}: cannot go from {old.name} to {state.name}")
+        now = time.monotonic()
+        seconds = now - self._entered
+        self.timings[old] = self.timings.get(old, 0.0) + seconds
+        self.state, self._entered = state, now
+        session_state_seconds.observe(seconds, state=old.value)
+
+        for listener in self._listeners:
+            try:
+                listener(self, old, state, seconds)
+            except Exception as e:
+                logger.error(f"Got error in session listener: {e}")
+
+    def __str__(self):
+        return f"{self.name} ({self.address})"
+
+
+SYNC_BUTTONS = (WatchButton.LOWER_RIGHT, WatchButton.NO_BUTTON, WatchButton.LOWER_LEFT)
+
+
+class SessionFlow:
+    """
+    What a server does with a watch, one step per session state. The scheduler
+    moves each session through the states and calls the matching step:
+
+        CONNECTED -> BUTTON_READ   read_button(), then accepts() decides whether to go on
+        BUTTON_READ -> SYNCING     sync(); its result is kept in session.synced
+        SYNCING -> DISPLAY         display()
+        DISCONNECTING -> DONE      finished(), after the watch is disconnected
+        DISCONNECTING -> FAILED    failed(), when the session ended with an error
+
+    The steps up to display() run while connected, under the protocol lock.
+    Work that does not need the watch - drawing frames, writing history -
+    belongs after it, where it overlaps with the disconnect and the next session.
+    """
+
+    async def read_button(self, session: WatchSession, api: GshockAPI) -> Optional[WatchButton]:
+        with span("get_pressed_button") as s:
+            button = await api.get_pressed_button()
+            s.set(button=button.name)
+        return button
+
+    def accepts(self, session: WatchSession) -> bool:
+        return session.button in SYNC_BUTTONS
+
+    async def sync(self, session: WatchSession, api: GshockAPI) -> bool:
+        return False
+
+    async def display(self, session: WatchSession, api: GshockAPI) -> None:
+        pass
+
+    def finished(self, session: WatchSession) -> None:
+        pass
+
+    def failed(self, session: WatchSession, error: BaseException) -> None:
+        pass
+
+
+class SessionScheduler:
+    """
+    Services several watches at once. A single scanner task hands every
+    advertising watch to its own session task, up to max_sessions at a time.
+    Each session task drives a WatchSession through its states (see
+    SessionState) and calls the flow's step for each; subscribe() to be told
+    of every transition and how long the state it left took.
+
+    gshock_api keeps per-watch state (watch_info, pending IO results) in
+    module globals, so the protocol exchange itself is serialized with a lock.
+    Scanning, connecting and disconnecting - the slow parts - overlap freely.
+    A watch's Connection is kept and reused for its next session.
+
+    Failures are classified (see retry_policy) and backed off exponentially:
+    scan failures pause the scanner, and a watch whose session failed is
+    ignored by the scanner until its retry delay has passed. Repeated adapter
+    failures open a circuit breaker that tries to recover the adapter.
+
+    With an adapter_monitor, the scanner does not scan while the adapter is
+    known to be down, and resumes as soon as the monitor reports it ready.
+    """
+
+    def __init__(
+        self,
+        flow: SessionFlow,
+        watch_filter: Optional[Callable[[str], bool]] = None,
+        max_sessions: int = 4,
+        session_timeout: float = 60.0,
+        scan_timeout: float = 10.0,
+        scan_schedule: Optional[ScanSchedule] = None,
+        backoff: Optional[Backoff] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        adapter_monitor: Optional[AdapterMonitor] = None,
+    ):
+        self.flow = flow
+        self.watch_filter = watch_filter
+        self.max_sessions = max(1, max_sessions)
+        self.session_timeout = session_timeout
+        self.scan_timeout = scan_timeout
+        self.scan_schedule = scan_schedule
+        self.backoff = backoff or Backoff()
+        self.breaker = breaker or CircuitBreaker(ensure_bt_ready)
+        self.adapter_monitor = adapter_monitor
+
+        self._slots = asyncio.Semaphore(self.max_sessions)
+        self._protocol_lock = asyncio.Lock()
+        self._active: Dict[str, asyncio.Task] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._connections: Dict[str, Connection] = {}
+        self._listeners: List[TransitionListener] = [self._log_transition]
+
+    @property
+    def active_sessions(self) -> int:
+        return len(self._active)
+
+    def subscribe(self, listener: TransitionListener) -> None:
+        """listener(session, old, new, seconds) is called on every state change of every session."""
+        self._listeners.append(listener)
+
+    async def run(self) -> None:
+        logger.info(f"Session scheduler started, max {self.max_sessions} concurrent sessions")
+        if self.adapter_monitor is not None:
+            self.adapter_monitor.subscribe(self._on_adapter_change)
+            self.adapter_monitor.start()
+
+        while True:
+            await self._slots.acquire()
+            await self.breaker.before_attempt()
+            if not self._adapter_ready():
+                self._slots.release()
+                await self._wait_for_adapter()
+                continue
+            scan_started = time.monotonic()
+            scan_timeout = self.scan_timeout
+            if self.scan_schedule is not None:
+                scan_timeout = self.scan_schedule.scan_secs(scan_timeout)
+            try:
+                with span("scan"):
+                    device = await self._scan(scan_timeout)
+            except Exception as e:
+                self._slots.release()
+                await asyncio.sleep(self._failed("scan", classify(e, "scan"), e))
+                continue
+
+            self.backoff.success("scan")
+            self.breaker.success()
+
+            if device is None:
+                self._slots.release()
+                if self.scan_schedule is not None:
+                    await asyncio.sleep(self.scan_schedule.pause_after_empty_scan())
+                continue
+
+            session = WatchSession(device.address, device.name or "", scan_started, self._listeners)
+            task = asyncio.create_task(self._run_session(session))
+            self._active[session.address] = task
+            active_sessions.set(len(self._active))
+
+    def _adapter_ready(self) -> bool:
+        state = self.adapter_monitor.state if self.adapter_monitor is not None else None
+        return state is None or state.ready
+
+    async def _wait_for_adapter(self) -> None:
+        delay = self._failed("scan", FailureKind.ADAPTER_DOWN)
+        try:
+            await asyncio.wait_for(self.adapter_monitor.wait_ready(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _on_adapter_change(self, old: AdapterState, new: AdapterState) -> None:
+        if new.ready:
+            self.backoff.success("scan")
+            self.breaker.success()
+
+    async def _scan(self, timeout: float) -> Optional[BLEDevice]:
+        def device_filter(d: BLEDevice, ad) -> bool:
+            if d.address in self._active:
+                return False
+            if d.address in self._retry_at and time.monotonic() < self._retry_at[d.address]:
+                return False
+            if CASIO_SERVICE_UUID not in (ad.service_uuids or []):
+                return False
+            return self.watch_filter is None or self.watch_filter(d.name)
+
+        logger.debug("Scanning for watches...")
+        device = await BleakScanner().find_device_by_filter(device_filter, timeout=timeout)
+        if device is not None:
+            logger.info(f"Found: {device.name} ({device.address})")
+        return device
+
+    def _failed(self, key: str, kind: FailureKind, error: Optional[BaseException] = None) -> float:
+        """Record a failure for key ("scan" or a watch address) and return the retry delay."""
+        delay = self.backoff.failure(key, kind)
+        failures_total.inc(kind=kind.name.lower())
+        if kind is FailureKind.ADAPTER_DOWN:
+            self.breaker.failure()
+        detail = f": {error}" if error is not None and str(error) else ""
+        logger.warning(
+            f"{kind.value} ({key}, attempt {self.backoff.attempts(key)}){detail}, retrying in {delay:.1f}s"
+        )
+        return delay
+
+    async def _run_session(self, session: WatchSession) -> None:
+        # Runs in its own task, so this only tags spans of this session
+        current_session.set(str(session))
+        served = False
+        error: Optional[BaseException] = None
+        try:
+            with span("session"):
+                served = await asyncio.wait_for(self._serve(session), timeout=self.session_timeout)
+            if served:
+                self.backoff.success(session.address)
+                self._retry_at.pop(session.address, None)
+                # Not for ignored buttons or syncs the clock policy refused
+                if session.synced:
+                    syncs_total.inc(watch=session.name)
+            else:
+                delay = self._failed(session.address, FailureKind.GATT_ERROR)
+                self._retry_at[session.address] = time.monotonic() + delay
+        except asyncio.TimeoutError as e:
+            logger.error(f"Session with {session} timed out after {self.session_timeout}s in {session.state.name}")
+            delay = self._failed(session.address, FailureKind.PROTOCOL_ERROR)
+            self._retry_at[session.address] = time.monotonic() + delay
+            served, error = False, e
+        except Exception as e:
+            logger.error(f"Got error in {session.state.name}: {e}")
+            delay = self._failed(session.address, classify(e, "session"), e)
+            self._retry_at[session.address] = time.monotonic() + delay
+            served, error = False, e
+        finally:
+            session.enter(SessionState.DISCONNECTING)
+            await self._disconnect(session)
+            session.enter(SessionState.DONE if served else SessionState.FAILED)
+            self._active.pop(session.address, None)
+            active_sessions.set(len(self._active))
+            self._slots.release()
+            self._finish(session, error)
+            if tracer.enabled:
+                await asyncio.to_thread(tracer.flush)
+
+    def _connection_for(self, address: str) -> Connection:
+        connection = self._connections.get(address)
+        if connection is None:
+            connection = self._connections[address] = Connection(address=address)
+        return connection
+
+    async def _serve(self, session: WatchSession) -> bool:
+        """Drive the session from CONNECTING to the end of DISPLAY. False if it could not connect."""
+        session.enter(SessionState.CONNECTING)
+        connection = self._connection_for(session.address)
+        session.connection = connection
+
+        start = time.perf_counter()
+        with span("connect"):
+            connected = await connection.connect()
+        connect_seconds.observe(time.perf_counter() - start, result="ok" if connected else "failed")
+        if not connected:
+            logger.info(f"Failed to connect to {session}")
+            return False
+        session.enter(SessionState.CONNECTED)
+
+        async with self._protocol_lock:
+            watch_info.set_name_and_model(session.name)
+            watch_info.set_address(session.address)
+            session.model = watch_info.model.name
+            session.always_connected = watch_info.alwaysConnected
+
+            logger.info(f"Connected to {session}")
+            api = GshockAPI(connection)
+
+            session.enter(SessionState.BUTTON_READ)
+            session.button = await self.flow.read_button(session, api)
+            if not self.flow.accepts(session):
+                logger.debug(f"Nothing to do for button {getattr(session.button, 'name', None)} on {session}")
+                return True
+
+            session.enter(SessionState.SYNCING)
+            session.synced = await self.flow.sync(session, api)
+
+            session.enter(SessionState.DISPLAY)
+            await self.flow.display(session, api)
+        return True
+
+    async def _disconnect(self, session: WatchSession) -> None:
+        connection = session.connection
+        if connection is None or connection.client is None or session.always_connected:
+            return
+        try:
+            if connection.client.is_connected:
+                with span("disconnect"):
+                    await connection.disconnect()
+        except Exception as e:
+            logger.error(f"Got error while disconnecting: {e}")
+
+    def _finish(self, session: WatchSession, error: Optional[BaseException]) -> None:
+        try:
+            if session.state is SessionState.DONE:
+                self.flow.finished(session)
+            elif error is not None:
+                self.flow.failed(session, error)
+        except Exception as e:
+            logger.error(f"Got error finishing session with {session}: {e}")
+
+    @staticmethod
+    def _log_transition(session: WatchSession, old: SessionState, new: SessionState, seconds: float) -> None:
+        logger.debug(f"{session}: {old.name} -> {new.name} after {seconds * 1000:.0f} ms")
@@ -0,0 +1,192 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class SyncRecord:
+    """One watch connection, as stored in the history."""
+    address: str
+    name: str = ""
+    model: str = ""
+    button: str = ""
+    # What the watch was set to minus host time, in seconds: the fine adjustment,
+    # the host clock correction and any latency compensation
+    offset: float = 0.0
+    duration: float = 0.0
+    battery: Optional[int] = None
+    temperature: Optional[int] = None
+    event: str = "sync"
+    timestamp: float = field(default_factory=time.time)
+    # Watch time minus reference time just before it was set, in seconds, when the watch could be read
+    pre_sync_error: Optional[float] = None
+    # The host clock correction (reference minus host time) included in offset
+    clock_offset: float = 0.0
+
+
+_COLUMNS = ("timestamp", "address", "name", "model", "event", "button",
+            "offset", "duration", "battery", "temperature", "pre_sync_error", "clock_offset")
+
+# Bumped for every schema change; see _migrate()
+SCHEMA_VERSION = 3
+
+
+class SyncHistory:
+    """
+    SQLite-backed history of watch syncs, indexed by watch address and time.
+
+    The table is pruned on every insert to at most max_age_days and max_rows,
+    so it stays bounded on a device that runs unattended for months.
+    Safe to call from worker threads; record_later() writes off the event loop.
+    The database is opened on first use, not when the server module is imported.
+    """
+
+    def __init__(self, path: str = "gshock_sync_history.db", max_rows: int = 20000, max_age_days: int = 365):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Only used with self._lock held
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._create_schema(self._conn)
+        return self._conn
+
+    @staticmethod
+    def _create_schema(db: sqlite3.Connection) -> None:
+        with db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS syncs (
+                    id INTEGER PRIMARY KEY,
+                    timestamp REAL NOT NULL,
+                    address TEXT NOT NULL,
+                    name TEXT,
+                    model TEXT,
+                    event TEXT NOT NULL,
+                    button TEXT,
+                    offset REAL,
+                    duration REAL,
+                    battery INTEGER,
+                    temperature INTEGER
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS syncs_address_time ON syncs (address, timestamp)")
+            db.execute("CREATE INDEX IF NOT EXISTS syncs_time ON syncs (timestamp)")
+            SyncHistory._migrate(db)
+
+    @staticmethod
+    def _migrate(db: sqlite3.Connection) -> None:
+        """Bring a database written by an older version up to SCHEMA_VERSION."""
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        columns = {row[1] for row in db.execute("PRAGMA table_info(syncs)")}
+        if version < 2 and "pre_sync_error" not in columns:
+            db.execute("ALTER TABLE syncs ADD COLUMN pre_sync_error REAL")
+        if version < 3 and "clock_offset" not in columns:
+            db.execute("ALTER TABLE syncs ADD COLUMN clock_offset REAL DEFAULT 0")
+        if version < SCHEMA_VERSION:
+            db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def record(self, record: SyncRecord) -> None:
+        values = tuple(getattr(record, column) for column in _COLUMNS)
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock, self._db:
+            self._db.execute(f"INSERT INTO syncs ({', '.join(_COLUMNS)}) VALUES ({placeholders})", values)
+            self._prune()
+
+    def record_later(self, record: SyncRecord) -> None:
+        """
+        Record from the event loop without waiting on disk; runs inline when no loop is running.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.record(record)
+            return
+        loop.run_in_executor(None, self.record, record)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.max_age_days * 86400
+        self._db.execute("DELETE FROM syncs WHERE timestamp < ?", (cutoff,))
+        self._db.execute(
+            "DELETE FROM syncs WHERE id <= (SELECT id FROM syncs ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (self.max_rows,),
+        )
+
+    def last_syncs(self, address: Optional[str] = None, n: int = 10) -> List[SyncRecord]:
+        """
+        The n most recent records, newest first, optionally for a single watch.
+        """
+        query = f"SELECT {', '.join(_COLUMNS)} FROM syncs"
+        params: tuple = ()
+        if address is not None:
+            query += " WHERE address = ?"
+            params = (address,)
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(query, params + (n,)).fetchall()
+        return [SyncRecord(**dict(zip(_COLUMNS, row))) for row in rows]
+
+    def syncs_per_day(self, address: Optional[str] = None, days: int = 30) -> List[Tuple[str, int]]:
+        """
+        (YYYY-MM-DD, count) pairs in local time for the last `days` days, oldest first.
+        """
+        query = (
+            "SELECT date(timestamp, 'unixepoch', 'localtime') AS day, COUNT(*) FROM syncs "
+            "WHERE timestamp >= ? AND event = 'sync'"
+        )
+        params: tuple = (time.time() - days * 86400,)
+        if address is not None:
+            query += " AND address = ?"
+            params += (address,)
+        query += " GROUP BY day ORDER BY day"
+        with self._lock:
+            return self._db.execute(query, params).fetchall()
+
+    def sync_times(self, since: float, button: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        (address, timestamp) of every successful sync since a time, optionally for one button.
+        """
+        query = "SELECT address, timestamp FROM syncs WHERE timestamp >= ? AND event = 'sync'"
+        params: tuple = (since,)
+        if button is not None:
+            query += " AND button = ?"
+            params += (button,)
+        with self._lock:
+            return self._db.execute(query + " ORDER BY timestamp", params).fetchall()
+
+    def sync_errors(self, address: str, since: float = 0.0) -> List[Tuple[float, Optional[float], float]]:
+        """
+        (timestamp, pre_sync_error, set_offset) of every successful sync of a watch since a
+        time, oldest first. The error is None where the watch time could not be read.
+        set_offset is what the watch was set to minus reference time, i.e. its error just after the sync.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT timestamp, pre_sync_error, COALESCE(offset, 0) - COALESCE(clock_offset, 0) FROM syncs "
+                "WHERE address = ? AND timestamp >= ? AND event = 'sync' ORDER BY timestamp",
+                (address, since),
+            ).fetchall()
+
+    def watches(self) -> List[Tuple[str, str, float]]:
+        """
+        (address, name, last seen timestamp) for every watch in the history.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT address, name, MAX(timestamp) FROM syncs GROUP BY address ORDER BY MAX(timestamp) DESC"
+            ).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
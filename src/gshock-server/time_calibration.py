@@ -0,0 +1,89 @@
+import asyncio
+import math
+import statistics
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from gshock_api.gshock_api import GshockAPI
+from gshock_api.logger import logger
+
+
+class LatencyEstimator:
+    """
+    Rolling estimate of the one-way BLE write latency, kept per watch model.
+    A sample is half the round trip of the acknowledged time write.
+    """
+
+    def __init__(self, window: int = 20, default_latency: float = 0.05, max_sample: float = 1.0):
+        self.window = window
+        self.default_latency = default_latency
+        self.max_sample = max_sample
+        self.samples: Dict[str, Deque[float]] = {}
+
+    def add_sample(self, model: str, one_way: float) -> None:
+        # Writes that were cut short (e.g. LOWER-RIGHT closes the link before the ack)
+        # produce meaningless timings, so drop anything implausible.
+        if one_way <= 0 or one_way > self.max_sample:
+            logger.debug(f"Ignoring latency sample {one_way:.3f}s for {model}")
+            return
+        self.samples.setdefault(model, deque(maxlen=self.window)).append(one_way)
+
+    def estimate(self, model: str) -> float:
+        samples = self.samples.get(model)
+        if not samples:
+            return self.default_latency
+        return statistics.median(samples)
+
+
+latency_estimator = LatencyEstimator()
+
+
+async def calibrated_set_time(api: GshockAPI, model: str, offset: int = 0, clock_offset: float = 0.0) -> float:
+    """
+    Set the time so that it lands on the watch exactly on a second boundary.
+
+    The watch takes the whole-second value it receives as the start of that second,
+    so the write is delayed until the next boundary minus the expected one-way latency.
+    clock_offset (reference minus host time, see time_source) corrects the host clock.
+    Returns the estimated error in seconds (positive means the watch is behind).
+    """
+    # The DST / world city exchange is several round trips; get it out of the way first
+    # so only the final time write sits on the timed path.
+    await api.initialize_for_setting_time()
+
+    def now() -> float:
+        return time.time() + clock_offset
+
+    latency = latency_estimator.estimate(model)
+    target = math.ceil(now() + latency + 0.05)
+    await asyncio.sleep(max(0.0, target - latency - now()))
+
+    sent_at = now()
+    start = time.perf_counter()
+    await api._set_time(target, offset)
+    round_trip = time.perf_counter() - start
+
+    one_way = round_trip / 2
+    latency_estimator.add_sample(model, one_way)
+
+    error = sent_at + one_way - target
+    logger.info(
+        f"Time set on {model}: round trip {round_trip * 1000:.0f} ms, "
+        f"estimated error {error * 1000:+.0f} ms"
+    )
+    return error
+
+
+async def uncalibrated_set_time(api: GshockAPI, offset: float = 0.0) -> float:
+    """
+    Set the time the way api.set_time() does, and return the offset the watch got.
+
+    gshock_api truncates host time + offset to a whole second, so the watch starts
+    that second up to a second late; the returned offset (watch minus host time)
+    includes the truncation. Transmission latency is not measured on this path.
+    """
+    await api.initialize_for_setting_time()
+    sent_at = time.time()
+    await api._set_time(None, offset)
+    return math.floor(sent_at + offset) - sent_at
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from gshock_api.gshock_api import GshockAPI
+from gshock_api.iolib.button_pressed_io import WatchButton
+from gshock_api.logger import logger
+from args import args
+from drift import read_clock_error
+from metrics import set_time_seconds
+from persistent_store import PersistentMap
+from session_scheduler import SessionFlow, WatchSession
+from sync_history import SyncHistory, SyncRecord
+from time_calibration import calibrated_set_time, uncalibrated_set_time
+from time_source import time_source
+from tracing import span
+
+
+async def set_time(api: GshockAPI, offset: int = 0, model: str = "", clock_offset: float = 0.0) -> float:
+    """Set the time and return the offset applied, as watch time minus host time."""
+    # Errors are left to the scheduler, so a failed write is counted as a failed session, not a sync
+    with set_time_seconds.time(model=model), span("set_time", model=model):
+        if args.latency_compensation:
+            error = await calibrated_set_time(api, model, offset=offset, clock_offset=clock_offset)
+            return offset + clock_offset - error
+        return await uncalibrated_set_time(api, offset + clock_offset)
+
+
+class TimeServerFlow(SessionFlow):
+    """
+    Sets the time on every watch that connects, and records each sync in the
+    history. Both servers run this flow; the display server adds its screens.
+    """
+
+    def __init__(self, store: PersistentMap, history: SyncHistory):
+        self.store = store
+        self.history = history
+
+    async def read_button(self, session: WatchSession, api: GshockAPI) -> WatchButton:
+        with self.store.batch():
+            self.store.add("last_connected", datetime.now().strftime("%m/%d %H:%M"))
+            self.store.add("watch_name", session.name)
+        return await super().read_button(session, api)
+
+    async def sync(self, session: WatchSession, api: GshockAPI) -> bool:
+        if not await time_source.allow_sync(args.clock_error_policy):
+            return False
+
+        # Apply fine adjustment to the time, and the host clock's offset from the reference
+        clock_offset = time_source.correction()
+        session.data["pre_sync_error"] = await read_clock_error(api, clock_offset)
+        session.data["clock_offset"] = clock_offset
+        session.data["offset"] = await set_time(
+            api, offset=int(args.fine_adjustment_secs), model=session.model, clock_offset=clock_offset
+        )
+
+        logger.info(f"Time set at {datetime.now()} on {session.name}")
+        return True
+
+    def finished(self, session: WatchSession) -> None:
+        if session.synced is None:
+            return
+        if not session.synced:
+            self.history.record_later(SyncRecord(
+                address=session.address, name=session.name, model=session.model,
+                button=session.button.name, event="refused",
+            ))
+            return
+        # Read by the display server's status screen, if it was shown
+        condition = session.data.get("condition")
+        self.history.record_later(SyncRecord(
+            address=session.address,
+            name=session.name,
+            model=session.model,
+            button=session.button.name,
+            offset=session.data["offset"],
+            duration=session.elapsed(),
+            battery=condition.get("battery_level_percent") if condition else None,
+            temperature=condition.get("temperature") if condition else None,
+            pre_sync_error=session.data.get("pre_sync_error"),
+            clock_offset=session.data["clock_offset"],
+        ))
+
+    def failed(self, session: WatchSession, error: BaseException) -> None:
+        self.history.record_later(SyncRecord(
+            address=session.address,
+            name=session.name,
+            model=session.model,
+            duration=session.elapsed(),
+            event="error",
+        ))
@@ -0,0 +1,237 @@
+import asyncio
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Tuple
+
+from gshock_api.logger import logger
+from metrics import clock_offset_seconds, clock_untrusted_total
+
+NTP_EPOCH_DELTA = 2208988800  # 1900-01-01 to 1970-01-01
+
+
+@dataclass
+class ClockStatus:
+    """
+    How far the host clock is from the reference. offset is reference minus
+    host, in seconds: add it to time.time() to get the reference time.
+    """
+    source: str
+    synchronized: bool
+    offset: float = 0.0
+    # Bound on how wrong the host clock is after correction; None when the source does not say
+    uncertainty: Optional[float] = None
+    drift_ppm: Optional[float] = None
+    measured_at: float = 0.0
+    reason: str = ""
+
+    def describe(self) -> str:
+        if not self.synchronized:
+            return f"not synchronized ({self.reason or self.source})"
+        text = f"offset {self.offset * 1000:+.1f} ms"
+        if self.uncertainty is not None:
+            text += f" ±{self.uncertainty * 1000:.1f} ms"
+        if self.drift_ppm is not None:
+            text += f", drift {self.drift_ppm:+.1f} ppm"
+        return f"{text} ({self.source})"
+
+
+class _SntpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if not self.future.done():
+            self.future.set_result((data, time.time()))
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+def _ntp_time(data: bytes, pos: int) -> float:
+    seconds, fraction = struct.unpack("!II", data[pos:pos + 8])
+    return seconds - NTP_EPOCH_DELTA + fraction / 2 ** 32
+
+
+async def sntp_query(host: str, port: int = 123, timeout: float = 2.0) -> Tuple[float, float]:
+    """One SNTP exchange. Returns (offset, round-trip delay) in seconds."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _SntpProtocol(future), remote_addr=(host, port)
+    )
+    try:
+        # LI 0, version 4, mode 3 (client)
+        request = bytearray(48)
+        request[0] = 0x23
+        t1 = time.time()
+        transport.sendto(bytes(request))
+        data, t4 = await asyncio.wait_for(future, timeout)
+    finally:
+        transport.close()
+    if len(data) < 48:
+        raise ValueError("short NTP reply")
+    if data[1] == 0:
+        raise ValueError("NTP server is unsynchronized (kiss of death)")
+    t2 = _ntp_time(data, 32)
+    t3 = _ntp_time(data, 40)
+    offset = ((t2 - t1) + (t3 - t4)) / 2
+    delay = (t4 - t1) - (t3 - t2)
+    return offset, delay
+
+
+async def _run(*command: str, timeout: float = 5.0) -> str:
+    proc = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return out.decode(errors="replace").strip()
+
+
+def parse_chrony_tracking(csv: str) -> ClockStatus:
+    """Parse `chronyc -c tracking`."""
+    fields = csv.split(",")
+    if len(fields) < 14:
+        raise ValueError(f"unexpected chronyc output: {csv!r}")
+    # The system time field is how much the clock is slow of NTP time, i.e. reference minus host
+    correction = float(fields[4])
+    root_delay = float(fields[10])
+    root_dispersion = float(fields[11])
+    leap = fields[13]
+    return ClockStatus(
+        source=f"chrony ({fields[1]})",
+        synchronized=leap != "Not synchronised",
+        offset=correction,
+        uncertainty=root_delay / 2 + root_dispersion,
+        measured_at=time.time(),
+        reason=leap,
+    )
+
+
+class TimeSource:
+    """
+    Tracks how far the host clock is from a reference, so watches are not set
+    from a clock that is wrong (a Pi without an RTC can boot hours off).
+
+    reference is one of:
+      "system"     trust the OS: only checks that systemd reports the clock as NTP-synchronized
+      "chrony"     ask the local chronyd for its offset and error bounds
+      "ntp:HOST"   query an NTP server directly (HOST may be a local stand-in, e.g. ntp:127.0.0.1)
+
+    The measured offset is applied to set_time (see correction()), drift is
+    estimated from successive measurements, and allow_sync() decides what to
+    do when the clock error exceeds max_error.
+    """
+
+    def __init__(self, reference: str = "system", max_error: float = 0.5, interval: float = 300.0, window: int = 16):
+        self.reference = reference
+        self.max_error = max_error
+        self.interval = interval
+        self.status = ClockStatus(source=reference, synchronized=False, reason="not checked yet")
+
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(self, reference: str, max_error: float) -> None:
+        self.reference = reference
+        self.max_error = max_error
+        self._samples.clear()
+
+    async def _measure(self) -> ClockStatus:
+        if self.reference == "system":
+            synced = await _run("timedatectl", "show", "-p", "NTPSynchronized", "--value")
+            return ClockStatus(
+                source="system", synchronized=synced == "yes", measured_at=time.time(),
+                reason="" if synced == "yes" else "timedatectl reports NTPSynchronized=no",
+            )
+        if self.reference == "chrony":
+            return parse_chrony_tracking(await _run("chronyc", "-c", "tracking"))
+        if self.reference.startswith("ntp:"):
+            host, _, port = self.reference[4:].partition(":")
+            offset, delay = await sntp_query(host, int(port or 123))
+            return ClockStatus(
+                source=self.reference, synchronized=True, offset=offset,
+                uncertainty=max(delay, 0.0) / 2, measured_at=time.time(),
+            )
+        raise ValueError(f"Unknown time reference {self.reference}")
+
+    def _estimate_drift(self) -> Optional[float]:
+        """Least-squares slope of offset over host time, in ppm."""
+        # Too few or too close together to tell drift from measurement noise
+        if len(self._samples) < 3 or self._samples[-1][0] - self._samples[0][0] < 600:
+            return None
+        n = len(self._samples)
+        mean_t = sum(t for t, _ in self._samples) / n
+        mean_o = sum(o for _, o in self._samples) / n
+        var = sum((t - mean_t) ** 2 for t, _ in self._samples)
+        cov = sum((t - mean_t) * (o - mean_o) for t, o in self._samples)
+        return cov / var * 1e6
+
+    async def refresh(self) -> ClockStatus:
+        previous = self.status
+        try:
+            status = await self._measure()
+        except Exception as e:
+            status = ClockStatus(source=self.reference, synchronized=False, measured_at=time.time(), reason=str(e))
+
+        if status.synchronized and status.uncertainty is not None:
+            self._samples.append((status.measured_at, status.offset))
+            status.drift_ppm = self._estimate_drift()
+        self.status = status
+        if status.synchronized:
+            clock_offset_seconds.set(status.offset)
+
+        if status.synchronized != previous.synchronized or status.reason != previous.reason:
+            logger.info(f"Host clock: {status.describe()}")
+        return status
+
+    def correction(self, now: Optional[float] = None) -> float:
+        """Seconds to add to the host time to get reference time, extrapolated by the drift."""
+        status = self.status
+        if not status.synchronized:
+            return 0.0
+        offset = status.offset
+        if status.drift_ppm is not None:
+            offset += status.drift_ppm * 1e-6 * ((now or time.time()) - status.measured_at)
+        return offset
+
+    def acceptable(self) -> bool:
+        status = self.status
+        if not status.synchronized:
+            return False
+        # Offsets are corrected for, so what matters is how well the offset is known
+        return status.uncertainty is None or status.uncertainty <= self.max_error
+
+    async def allow_sync(self, policy: str) -> bool:
+        """
+        policy "flag": always sync, but warn when the host clock is not trustworthy.
+        policy "refuse": do not set watches from an untrustworthy clock.
+        """
+        if not self.status.measured_at:
+            # First sync before the background check ran: measure now rather than at startup
+            await self.refresh()
+        if self.acceptable():
+            return True
+        action = "refusing to set the time" if policy == "refuse" else "setting the time anyway"
+        logger.warning(f"Host clock {self.status.describe()}, {action}")
+        clock_untrusted_total.inc(policy=policy)
+        return policy != "refuse"
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+
+time_source = TimeSource()
@@ -0,0 +1,173 @@
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from gshock_api.logger import logger
+
+# The session (watch) the current task is serving; set by the scheduler per session task
+current_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_session", default=None)
+
+FORMATS = ("jsonl", "chrome")
+
+
+class _NullSpan:
+    """Returned when tracing is off: entering and leaving it costs a method call."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "start", "wall_start", "session")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.session = current_session.get()
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._record(self, duration)
+        return False
+
+
+class Tracer:
+    """
+    Records how long each phase of a watch session takes (scan, connect,
+    button read, set_time, display, disconnect). Spans nest freely; each is
+    tagged with the session of the task that opened it.
+
+    Output is JSON lines (one span per line) or the Chrome trace event format,
+    which chrome://tracing and Perfetto open directly, with one row per watch.
+    Events are buffered and appended to the file by flush(). When disabled,
+    span() returns a shared no-op object.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.format = "jsonl"
+
+        self._buffer: List[dict] = []
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._pid = os.getpid()
+
+    def configure(self, path: Optional[str], format: str = "jsonl") -> None:
+        if format not in FORMATS:
+            raise ValueError(f"Unknown trace format {format}, expected one of {FORMATS}")
+        self.path = path
+        self.format = format
+        self.enabled = path is not None
+        if not self.enabled:
+            return
+        if format == "chrome" and not (os.path.exists(path) and os.path.getsize(path) > 0):
+            # The trace viewer accepts an unterminated array, so events can simply be appended
+            with open(path, "w") as f:
+                f.write("[\n")
+        atexit.register(self.flush)
+        logger.info(f"Tracing sync phases to {path} ({format})")
+
+    def span(self, name: str, **attrs: Any):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs)
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """Decorator form of span(), for plain and async functions."""
+        def decorate(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _row(self, key: str) -> int:
+        # Called with the lock held
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._rows) + 1
+            if self.format == "chrome":
+                self._buffer.append({
+                    "name": "thread_name", "ph": "M", "pid": self._pid, "tid": row, "args": {"name": key},
+                })
+        return row
+
+    def _record(self, span: Span, duration: float) -> None:
+        thread = threading.current_thread().name
+        with self._lock:
+            if self.format == "chrome":
+                self._buffer.append({
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": round(span.wall_start * 1e6),
+                    "dur": round(duration * 1e6),
+                    "pid": self._pid,
+                    "tid": self._row(span.session or thread),
+                    "args": span.attrs,
+                })
+            else:
+                event = {
+                    "name": span.name,
+                    "session": span.session,
+                    "thread": thread,
+                    "start": round(span.wall_start, 6),
+                    "duration_ms": round(duration * 1000, 3),
+                }
+                event.update(span.attrs)
+                self._buffer.append(event)
+
+    def flush(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return
+        suffix = ",\n" if self.format == "chrome" else "\n"
+        try:
+            with open(self.path, "a") as f:
+                f.write("".join(json.dumps(e, default=str) + suffix for e in events))
+        except OSError as e:
+            logger.warning(f"Could not write trace file: {e}")
+
+
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
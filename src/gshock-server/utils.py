@@ -1,7 +1,39 @@
+import asyncio
+import signal
+from typing import Callable
+
+from gshock_api.logger import logger
+
 _run_once_registry = set()
 
 def run_once_key(key, func, *args, **kwargs):
     if key in _run_once_registry:
         return
     _run_once_registry.add(key)
-    return func(*args, **kwargs)
\ No newline at end of file
+    return func(*args, **kwargs)
+
+
+def stop_on_signals(task: asyncio.Task, *flushers: Callable[[], None]) -> None:
+    """
+    On SIGTERM or SIGINT, run the flushers and cancel task so the server exits cleanly.
+    systemctl stop/restart sends SIGTERM, which would otherwise end the process
+    without running atexit handlers, losing writes that are still pending.
+    """
+    loop = asyncio.get_running_loop()
+
+    def stop(sig: signal.Signals) -> None:
+        logger.info(f"Got {sig.name}, shutting down")
+        for flush in flushers:
+            try:
+                flush()
+            except Exception as e:
+                logger.error(f"Got error while flushing on shutdown: {e}")
+        task.cancel()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop, sig)
+        except NotImplementedError:
+            # Windows event loops have no signal handlers. Ctrl-C still raises
+            # KeyboardInterrupt there, and the atexit flushes run on the way out.
+            logger.debug(f"Cannot handle {sig.name} on this event loop")
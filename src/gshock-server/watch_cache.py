@@ -0,0 +1,121 @@
+import copy
+import functools
+import time
+from typing import Dict, Iterable, List, Optional
+
+from persistent_store import PersistentMap
+
+# Seconds after which a cached value is refreshed in the background, on a
+# connection nobody is waiting for (the watch's own auto time adjustment).
+DEFAULT_TTL = {
+    "alarms": 6 * 3600,
+    "reminder": 6 * 3600,
+    "auto_sync": 24 * 3600,
+    "condition": 0,
+}
+
+# Seconds after which a cached value is too old to show, and the status screen
+# reads it before drawing. The condition (battery, temperature) is always read;
+# its cached value only draws the first frame while the read is in flight.
+DEFAULT_MAX_AGE = {
+    "alarms": 24 * 3600,
+    "reminder": 24 * 3600,
+    "auto_sync": 7 * 24 * 3600,
+    "condition": 0,
+}
+
+# gshock_api setters, and the cached values a successful call changes
+WRITES = {
+    "set_alarms": ("alarms",),
+    "set_reminders": ("reminder",),
+    "set_time_adjustment": ("auto_sync",),
+}
+
+
+class WatchDataCache:
+    """
+    Per-watch cache of slow-changing watch data (alarms, reminders, settings),
+    keyed by watch address and persisted in a PersistentMap.
+
+    A value older than its TTL is stale: it is still shown, and refreshed the
+    next time the watch connects on its own. One older than its max age, or
+    changed by a write through an api passed to track_writes(), is read again
+    before it is shown. All entries for an address are dropped when a
+    different watch shows up at that address.
+    """
+
+    def __init__(
+        self,
+        store: PersistentMap,
+        ttl: Optional[Dict[str, float]] = None,
+        max_age: Optional[Dict[str, float]] = None,
+    ):
+        self.store = store
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.max_age = dict(DEFAULT_MAX_AGE, **(max_age or {}))
+
+    def _entry(self, address: str) -> dict:
+        return self.store.get(address) or {"name": None, "values": {}}
+
+    def check_watch(self, address: str, name: str) -> None:
+        """Forget everything cached for address if it now belongs to another watch."""
+        entry = self._entry(address)
+        if entry["name"] != name:
+            self.store.add(address, {"name": name, "values": {}})
+
+    def values(self, address: str) -> dict:
+        """All cached values for a watch, fresh or stale."""
+        return {key: item["value"] for key, item in self._entry(address)["values"].items()}
+
+    def _older_than(self, address: str, keys: Iterable[str], ages: Dict[str, float]) -> List[str]:
+        cached = self._entry(address)["values"]
+        now = time.time()
+        return [
+            key for key in keys
+            if key not in cached or now - cached[key]["time"] >= ages.get(key, 0)
+        ]
+
+    def stale_keys(self, address: str, keys: Iterable[str]) -> List[str]:
+        """The keys that are missing or older than their TTL, to refresh in the background."""
+        return self._older_than(address, keys, self.ttl)
+
+    def expired_keys(self, address: str, keys: Iterable[str]) -> List[str]:
+        """The keys that are missing or older than their max age, to read before showing them."""
+        return self._older_than(address, keys, self.max_age)
+
+    def update(self, address: str, values: dict) -> None:
+        if not values:
+            return
+        entry = self._entry(address)
+        now = time.time()
+        for key, value in values.items():
+            # Copy: gshock_api hands out lists it clears on the next read
+            entry["values"][key] = {"value": copy.deepcopy(value), "time": now}
+        self.store.add(address, entry)
+
+    def invalidate(self, address: str, keys: Optional[Iterable[str]] = None) -> None:
+        """
+        Mark keys (all by default) expired, so they are read on the next connection.
+        The old values are kept for values(), to draw the first frame until then.
+        """
+        entry = self._entry(address)
+        cached = entry["values"]
+        for key in (cached if keys is None else keys):
+            if key in cached:
+                cached[key]["time"] = 0.0
+        self.store.add(address, entry)
+
+    def track_writes(self, api, address: str) -> None:
+        """Invalidate what each successful write through api's setters (see WRITES) changes."""
+        for name, keys in WRITES.items():
+            write = getattr(api, name, None)
+            if write is not None:
+                setattr(api, name, self._invalidating(write, address, keys))
+
+    def _invalidating(self, write, address: str, keys: Iterable[str]):
+        @functools.wraps(write)
+        async def wrapper(*args, **kwargs):
+            result = await write(*args, **kwargs)
+            self.invalidate(address, keys)
+            return result
+        return wrapper
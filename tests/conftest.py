@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The server modules are flat files in src/gshock-server, imported by their module name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "gshock-server"))
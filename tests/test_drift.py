@@ -0,0 +1,99 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from drift import SPEC_PPM, drift_report, estimate_drift, read_clock_error
+from sync_history import SyncHistory, SyncRecord
+
+DAY = 86400
+
+
+class FakeClockAPI:
+    """A watch that can report its time, running offset seconds from the host clock."""
+
+    def __init__(self, offset: float, as_datetime: bool = True):
+        self.offset = offset
+        self.as_datetime = as_datetime
+
+    async def get_time(self):
+        t = time.time() + self.offset
+        return datetime.fromtimestamp(t) if self.as_datetime else t
+
+
+class FailingClockAPI:
+    async def get_time(self):
+        raise OSError("not connected")
+
+
+@pytest.fixture
+def history(tmp_path):
+    h = SyncHistory(str(tmp_path / "history.db"))
+    yield h
+    h.close()
+
+
+def add_syncs(history, address, drift_ppm, offset, clock_offset=0.0, days=10, per_day=4):
+    """
+    Syncs at a regular interval. Each one sets the watch to offset - clock_offset from
+    the reference, and by the next one it has drifted by drift_ppm on top of that.
+    """
+    interval = DAY / per_day
+    start = time.time() - days * DAY
+    for i in range(days * per_day):
+        history.record(SyncRecord(
+            address=address,
+            name=f"CASIO {address}",
+            button="NO_BUTTON",
+            offset=offset,
+            clock_offset=clock_offset,
+            timestamp=start + i * interval,
+            pre_sync_error=None if i == 0 else offset - clock_offset + drift_ppm * 1e-6 * interval,
+        ))
+
+
+def read_clock_error_of(api, clock_offset=0.0):
+    return asyncio.run(read_clock_error(api, clock_offset))
+
+
+def test_read_clock_error():
+    assert read_clock_error_of(FakeClockAPI(1.5)) == pytest.approx(1.5, abs=0.05)
+    assert read_clock_error_of(FakeClockAPI(-0.25, as_datetime=False)) == pytest.approx(-0.25, abs=0.05)
+    # The reference is host time plus the clock correction
+    assert read_clock_error_of(FakeClockAPI(1.5), clock_offset=0.5) == pytest.approx(1.0, abs=0.05)
+
+
+def test_read_clock_error_without_get_time():
+    assert read_clock_error_of(object()) is None
+    assert read_clock_error_of(FailingClockAPI()) is None
+
+
+def test_fine_adjustment_is_not_drift(history):
+    add_syncs(history, "AA", drift_ppm=2.0, offset=2.0)
+    estimate = estimate_drift(history, "AA", "CASIO AA")
+    assert estimate.samples == 39
+    assert estimate.drift_ppm == pytest.approx(2.0, abs=0.01)
+    assert not estimate.out_of_spec
+
+
+def test_clock_correction_is_not_drift(history):
+    # The watch got host time + 0.3 s, which the clock source said was the reference time
+    add_syncs(history, "AA", drift_ppm=-3.0, offset=0.3, clock_offset=0.3)
+    assert estimate_drift(history, "AA").drift_ppm == pytest.approx(-3.0, abs=0.01)
+
+
+def test_drift_report(history):
+    add_syncs(history, "AA", drift_ppm=2.0, offset=2.0)
+    add_syncs(history, "BB", drift_ppm=-20.0, offset=0.0)
+    history.record(SyncRecord(address="CC", name="CASIO CC", timestamp=time.time() - DAY))
+
+    report = drift_report(history)
+    assert [e.address for e in report] == ["BB", "AA", "CC"]
+    bb, aa, cc = report
+    assert bb.drift_ppm == pytest.approx(-20.0, abs=0.01)
+    assert bb.out_of_spec and abs(bb.drift_ppm) > SPEC_PPM
+    # 0.5 s tolerance at 20 ppm: resync every 25000 s
+    assert bb.sync_interval(0.5) == pytest.approx(25000, rel=0.01)
+    assert not aa.out_of_spec
+    assert cc.drift_ppm is None and cc.samples == 0
@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+from persistent_store import JournalBackend, PersistentMap
+
+
+class RecordingBackend:
+    """Keeps every save in memory, to count writes."""
+
+    def __init__(self):
+        self.saves = []
+
+    def load(self):
+        return {}
+
+    def save(self, data, changes):
+        self.saves.append((data, list(changes)))
+
+
+def journal_lines(path):
+    with open(f"{path}.journal") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_journal_round_trip(tmp_path):
+    path = str(tmp_path / "data.json")
+    m = PersistentMap(path, backend=JournalBackend(path))
+    m.add("a", 1)
+    m.add("b", {"x": [1, 2]})
+    m.delete("a")
+
+    assert journal_lines(path) == [["set", "a", 1], ["set", "b", {"x": [1, 2]}], ["delete", "a", None]]
+    assert PersistentMap(path, backend=JournalBackend(path)).data == {"b": {"x": [1, 2]}}
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / "data.json")
+    with open(f"{path}.journal", "w") as f:
+        f.write('["set", "a", 1]\n["set", "b", 2]\n["set", "c", ')
+
+    backend = JournalBackend(path)
+    assert backend.load() == {"a": 1, "b": 2}
+    # The good entries are folded into the snapshot and the journal starts clean
+    with open(path) as f:
+        assert json.load(f) == {"a": 1, "b": 2}
+    assert journal_lines(path) == []
+
+    m = PersistentMap(path, backend=JournalBackend(path))
+    m.add("c", 3)
+    assert PersistentMap(path, backend=JournalBackend(path)).data == {"a": 1, "b": 2, "c": 3}
+
+
+def test_compaction_threshold(tmp_path):
+    path = str(tmp_path / "data.json")
+    m = PersistentMap(path, backend=JournalBackend(path, compact_every=3))
+    m.add("a", 1)
+    m.add("b", 2)
+    assert len(journal_lines(path)) == 2
+
+    # The third entry reaches compact_every: snapshot rewritten, journal emptied
+    m.add("c", 3)
+    with open(path) as f:
+        assert json.load(f) == {"a": 1, "b": 2, "c": 3}
+    assert journal_lines(path) == []
+
+    m.add("d", 4)
+    assert journal_lines(path) == [["set", "d", 4]]
+    assert PersistentMap(path, backend=JournalBackend(path)).data == {"a": 1, "b": 2, "c": 3, "d": 4}
+
+
+def test_replay_after_crash_between_rename_and_truncate(tmp_path):
+    path = str(tmp_path / "data.json")
+    # The new snapshot is in place, but the journal it absorbed was never reset
+    with open(path, "w") as f:
+        json.dump({"b": 2, "c": 3}, f)
+    with open(f"{path}.journal", "w") as f:
+        for change in (["set", "a", 1], ["set", "b", 2], ["delete", "a", None], ["set", "c", 3]):
+            f.write(json.dumps(change) + "\n")
+
+    assert JournalBackend(path).load() == {"b": 2, "c": 3}
+
+
+def test_clear_is_replayed(tmp_path):
+    path = str(tmp_path / "data.json")
+    m = PersistentMap(path, backend=JournalBackend(path))
+    m.add("a", 1)
+    m.clear()
+    m.add("b", 2)
+    assert PersistentMap(path, backend=JournalBackend(path)).data == {"b": 2}
+
+
+def test_loads_legacy_json_snapshot(tmp_path):
+    path = str(tmp_path / "data.json")
+    # Written by the plain JSON backend: a snapshot and no journal
+    legacy = PersistentMap(path)
+    legacy.add("watch_name", "CASIO GW-B5600")
+
+    m = PersistentMap(path, backend=JournalBackend(path))
+    assert m.get("watch_name") == "CASIO GW-B5600"
+    m.add("last_connected", "10/18 16:00")
+    assert PersistentMap(path, backend=JournalBackend(path)).data == {
+        "watch_name": "CASIO GW-B5600", "last_connected": "10/18 16:00",
+    }
+
+
+def test_batch_writes_once(tmp_path):
+    backend = RecordingBackend()
+    m = PersistentMap(str(tmp_path / "data.json"), backend=backend)
+    with m.batch():
+        m.add("a", 1)
+        m.add("b", 2)
+        assert backend.saves == []
+    assert backend.saves == [({"a": 1, "b": 2}, [("set", "a", 1), ("set", "b", 2)])]
+
+    # Without a batch, every change is its own write
+    m.add("c", 3)
+    assert len(backend.saves) == 2
+
+
+def test_write_behind_coalesces(tmp_path):
+    backend = RecordingBackend()
+    m = PersistentMap(str(tmp_path / "data.json"), write_behind=True, flush_delay=0.05, backend=backend)
+
+    async def main():
+        m.add("a", 1)
+        m.add("a", 2)
+        with m.batch():
+            m.add("b", 3)
+        assert backend.saves == [] and m.dirty
+        await asyncio.sleep(0.2)
+
+    asyncio.run(main())
+    assert backend.saves == [({"a": 2, "b": 3}, [("set", "a", 1), ("set", "a", 2), ("set", "b", 3)])]
+    assert not m.dirty
+
+
+def test_write_behind_flush_writes_now(tmp_path):
+    backend = RecordingBackend()
+    m = PersistentMap(str(tmp_path / "data.json"), write_behind=True, flush_delay=60, backend=backend)
+
+    async def main():
+        m.add("a", 1)
+        m.flush()
+        assert backend.saves == [({"a": 1}, [("set", "a", 1)])]
+        # The flush cancelled the delayed write, and nothing is left to write
+        m.flush()
+        assert len(backend.saves) == 1
+
+    asyncio.run(main())
+
+
+def test_write_behind_without_event_loop_writes_now(tmp_path):
+    backend = RecordingBackend()
+    m = PersistentMap(str(tmp_path / "data.json"), write_behind=True, backend=backend)
+    m.add("a", 1)
+    assert backend.saves == [({"a": 1}, [("set", "a", 1)])]
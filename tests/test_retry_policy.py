@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from gshock_api.exceptions import GShockConnectionError
+
+import retry_policy
+from retry_policy import Backoff, CircuitBreaker, FailureKind, RetryPolicy, classify
+
+
+@pytest.mark.parametrize("error, stage, kind", [
+    (asyncio.TimeoutError(), "scan", FailureKind.SCAN_TIMEOUT),
+    (asyncio.TimeoutError(), "session", FailureKind.PROTOCOL_ERROR),
+    (ConnectionResetError("reset by peer"), "session", FailureKind.GATT_ERROR),
+    (BrokenPipeError(), "session", FailureKind.GATT_ERROR),
+    (EOFError(), "connect", FailureKind.GATT_ERROR),
+    (ConnectionRefusedError("bluetoothd is not running"), "scan", FailureKind.ADAPTER_DOWN),
+    (OSError("No such device"), "session", FailureKind.ADAPTER_DOWN),
+    (RuntimeError("org.bluez.Error.NotReady"), "session", FailureKind.ADAPTER_DOWN),
+    (RuntimeError("anything"), "scan", FailureKind.ADAPTER_DOWN),
+    (RuntimeError("anything"), "connect", FailureKind.GATT_ERROR),
+    (GShockConnectionError("Unable to send time to watch"), "session", FailureKind.GATT_ERROR),
+    (GShockConnectionError("timeout waiting for reply"), "session", FailureKind.PROTOCOL_ERROR),
+    (ValueError("bad reply"), "session", FailureKind.PROTOCOL_ERROR),
+])
+def test_classify(error, stage, kind):
+    assert classify(error, stage) is kind
+
+
+def test_retry_delay_grows_and_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0, jitter=0.0)
+    assert [policy.delay(n) for n in range(6)] == [0.0, 1.0, 2.0, 4.0, 8.0, 10.0]
+
+
+def test_retry_delay_jitter_stays_within_bounds():
+    policy = RetryPolicy(base_delay=4.0, max_delay=5.0, jitter=0.25)
+    for _ in range(200):
+        assert 3.0 <= policy.delay(1) <= 5.0
+        assert policy.delay(2) <= 5.0
+
+
+def test_backoff_counts_per_key_and_resets():
+    backoff = Backoff({kind: RetryPolicy(base_delay=1.0, max_delay=100.0, jitter=0.0) for kind in FailureKind})
+    assert backoff.failure("AA", FailureKind.GATT_ERROR) == 1.0
+    assert backoff.failure("AA", FailureKind.GATT_ERROR) == 2.0
+    assert backoff.failure("BB", FailureKind.GATT_ERROR) == 1.0
+    assert backoff.attempts("AA") == 2
+
+    backoff.success("AA")
+    assert backoff.attempts("AA") == 0
+    assert backoff.failure("AA", FailureKind.GATT_ERROR) == 1.0
+    assert backoff.attempts("BB") == 1
+
+
+def test_backoff_keeps_default_policies():
+    backoff = Backoff({FailureKind.GATT_ERROR: RetryPolicy(base_delay=0.0, max_delay=0.0)})
+    assert backoff.failure("AA", FailureKind.GATT_ERROR) == 0.0
+    assert backoff.failure("scan", FailureKind.ADAPTER_DOWN) > 0.0
+
+
+class Recovery:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return True
+
+
+def test_circuit_breaker(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(retry_policy.time, "monotonic", lambda: now[0])
+    recover = Recovery()
+    breaker = CircuitBreaker(recover, threshold=3, cooldown=60.0)
+
+    async def attempt():
+        await breaker.before_attempt()
+
+    breaker.failure()
+    breaker.failure()
+    asyncio.run(attempt())
+    assert not breaker.open and recover.calls == 0
+
+    breaker.failure()
+    assert breaker.open
+    asyncio.run(attempt())
+    assert recover.calls == 1
+
+    # Still open, but within the cooldown: no second recovery yet
+    breaker.failure()
+    now[0] += 30
+    asyncio.run(attempt())
+    assert recover.calls == 1
+    now[0] += 31
+    asyncio.run(attempt())
+    assert recover.calls == 2
+
+    breaker.success()
+    assert not breaker.open
+    asyncio.run(attempt())
+    assert recover.calls == 2
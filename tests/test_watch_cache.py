@@ -0,0 +1,63 @@
+import asyncio
+
+import watch_cache
+from persistent_store import PersistentMap
+from watch_cache import WatchDataCache
+
+HOUR = 3600
+
+
+class RecordingAPI:
+    def __init__(self):
+        self.alarms = None
+
+    async def set_alarms(self, alarms):
+        self.alarms = alarms
+
+
+def make_cache(tmp_path, monkeypatch, now):
+    monkeypatch.setattr(watch_cache.time, "time", lambda: now[0])
+    return WatchDataCache(PersistentMap(str(tmp_path / "cache.json")), max_age={"alarms": 24 * HOUR})
+
+
+def test_stale_values_are_shown_until_they_expire(tmp_path, monkeypatch):
+    now = [1000000.0]
+    cache = make_cache(tmp_path, monkeypatch, now)
+    cache.check_watch("AA", "CASIO GW-B5600")
+    keys = ["alarms", "condition"]
+    assert cache.expired_keys("AA", keys) == keys
+
+    cache.update("AA", {"alarms": [{"hour": 7, "minute": 0}], "condition": {"battery_level_percent": 80}})
+    # The condition is always read; the alarms are fresh
+    assert cache.stale_keys("AA", keys) == ["condition"]
+    assert cache.expired_keys("AA", keys) == ["condition"]
+
+    # Past the TTL: refreshed in the background, but still shown
+    now[0] += 7 * HOUR
+    assert cache.stale_keys("AA", keys) == keys
+    assert cache.expired_keys("AA", keys) == ["condition"]
+
+    now[0] += 18 * HOUR
+    assert cache.expired_keys("AA", keys) == keys
+    assert cache.values("AA")["alarms"] == [{"hour": 7, "minute": 0}]
+
+
+def test_write_invalidates(tmp_path, monkeypatch):
+    now = [1000000.0]
+    cache = make_cache(tmp_path, monkeypatch, now)
+    cache.check_watch("AA", "CASIO GW-B5600")
+    cache.update("AA", {"alarms": [], "reminder": None})
+    api = RecordingAPI()
+    cache.track_writes(api, "AA")
+
+    asyncio.run(api.set_alarms([{"hour": 6, "minute": 30}]))
+    assert api.alarms == [{"hour": 6, "minute": 30}]
+    assert cache.expired_keys("AA", ["alarms", "reminder"]) == ["alarms"]
+
+
+def test_other_watch_at_address_clears_cache(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch, [1000000.0])
+    cache.check_watch("AA", "CASIO GW-B5600")
+    cache.update("AA", {"alarms": []})
+    cache.check_watch("AA", "CASIO GA-B2100")
+    assert cache.values("AA") == {}